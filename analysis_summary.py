@@ -0,0 +1,128 @@
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_store import CLEANED_DATA_PATH, load_cleaned_data, parquet_path_for
+from train_model import TOP_FEATURES
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SUMMARY_PATH = 'analysis_summary.json'
+NUMERICAL_FEATURES = ['InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt', 'IPAnnualDeductibleAmt',
+                      'TotalReimbursement']
+CORRELATION_FEATURES = TOP_FEATURES + ['PotentialFraud']
+HIST_BINS = 50
+KDE_POINTS = 200
+KDE_FINE_BINS = 2048
+
+
+def dataset_version(path=CLEANED_DATA_PATH):
+    """
+    Identifies the current version of the cleaned data by the size and
+    modification time of its CSV and Parquet files. This is cheap enough to
+    check on every page visit.
+
+    Raises:
+        FileNotFoundError: If neither file exists.
+    """
+    version = []
+    for file in (path, parquet_path_for(path)):
+        if os.path.exists(file):
+            stat = os.stat(file)
+            version.append(f'{os.path.basename(file)}:{stat.st_size}:{stat.st_mtime_ns}')
+    if not version:
+        raise FileNotFoundError(f"No cleaned data at '{path}'")
+    return '|'.join(version)
+
+
+def histogram_kde(values, bins=HIST_BINS, grid_points=KDE_POINTS, fine_bins=KDE_FINE_BINS):
+    """
+    Bins a column for a histogram and estimates its Gaussian KDE on a grid.
+
+    The KDE uses Scott's bandwidth, as seaborn does, but is evaluated from
+    a fine histogram of the column instead of every row, so its cost does
+    not grow with the number of rows.
+
+    Returns:
+        dict: Bin edges and counts, and the KDE grid with its density.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values, bins=bins)
+    grid = np.linspace(edges[0], edges[-1], grid_points)
+    density = np.zeros(grid_points)
+
+    n = len(values)
+    bandwidth = values.std(ddof=1) * n ** (-1 / 5) if n > 1 else 0.0
+    if bandwidth > 0:
+        fine_counts, fine_edges = np.histogram(values, bins=fine_bins)
+        centers = (fine_edges[:-1] + fine_edges[1:]) / 2
+        kernel = np.exp(-0.5 * ((grid[:, None] - centers) / bandwidth) ** 2)
+        density = kernel @ fine_counts / (n * bandwidth * np.sqrt(2 * np.pi))
+    return {'edges': edges.tolist(), 'counts': counts.tolist(), 'grid': grid.tolist(), 'density': density.tolist()}
+
+
+def _frame_to_dict(df):
+    return json.loads(df.to_json(orient='split'))
+
+
+def build_summary(data_path=CLEANED_DATA_PATH):
+    """
+    Computes everything the Data Analysis page shows from the cleaned data.
+
+    Returns:
+        dict: The dataset version, shape, a preview, descriptive statistics,
+        fraud counts, histograms with KDE grids and the correlation matrix.
+    """
+    version = dataset_version(data_path)
+    df = load_cleaned_data(data_path)
+    fraud_counts = df['PotentialFraud'].value_counts().sort_index()
+    return {
+        'version': version,
+        'rows': len(df),
+        'columns': df.shape[1],
+        'head': _frame_to_dict(df.head()),
+        'describe': _frame_to_dict(df.describe()),
+        'fraud_counts': {str(label): int(count) for label, count in fraud_counts.items()},
+        'histograms': {feature: histogram_kde(df[feature]) for feature in NUMERICAL_FEATURES},
+        'correlation': _frame_to_dict(df[CORRELATION_FEATURES].astype('float64').corr()),
+    }
+
+
+def load_summary(data_path=CLEANED_DATA_PATH, summary_path=SUMMARY_PATH):
+    """
+    Returns the summary for the current dataset version, rebuilding and
+    saving it only when the cleaned data has changed since it was written.
+    """
+    version = dataset_version(data_path)
+    if os.path.exists(summary_path):
+        with open(summary_path) as f:
+            summary = json.load(f)
+        if summary.get('version') == version:
+            return summary
+
+    logging.info(f"Building analysis summary for '{data_path}'...")
+    summary = build_summary(data_path)
+    with open(summary_path + '.tmp', 'w') as f:
+        json.dump(summary, f)
+    os.replace(summary_path + '.tmp', summary_path)
+    logging.info(f"Analysis summary saved to '{summary_path}'.")
+    return summary
+
+
+def frame_from_dict(data):
+    """Rebuilds a DataFrame stored in the summary."""
+    return pd.DataFrame(data['data'], index=data['index'], columns=data['columns'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute the aggregates shown on the Data Analysis page.')
+    parser.add_argument('--data', default=CLEANED_DATA_PATH, help='Cleaned claims data.')
+    parser.add_argument('--output', default=SUMMARY_PATH, help='Where to save the summary.')
+    args = parser.parse_args()
+
+    load_summary(args.data, args.output)
@@ -0,0 +1,281 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+HISTORY_PATH = 'benchmark_history.json'
+STAGES = ['preprocess', 'train', 'predict_single', 'predict_batch', 'explain_single', 'explain_batch']
+# Fixed parameters so the benchmark times one fit instead of the grid search
+TRAIN_PARAMS = {'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 5, 'min_samples_split': 10,
+                'min_samples_leaf': 6}
+SINGLE_REPEATS = 200
+BATCH_SIZE = 100000
+EXPLAIN_BATCH_SIZE = 1000
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _load_features(n_rows=None):
+    from feature_store import load_cleaned_data
+    from train_model import TOP_FEATURES
+
+    X = load_cleaned_data(columns=TOP_FEATURES)
+    return X if n_rows is None else X.iloc[:n_rows]
+
+
+def _load_artifacts():
+    import joblib
+    from train_model import MODEL_PATH, SCALER_PATH
+
+    return joblib.load(MODEL_PATH), joblib.load(SCALER_PATH)
+
+
+def _preprocess(params):
+    import pyarrow.parquet as pq
+    from feature_store import parquet_path_for
+    from preprocess_data import OUTPUT_PATH, preprocess_data
+
+    start = time.perf_counter()
+    preprocess_data(chunksize=params['chunksize'])
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': pq.ParquetFile(parquet_path_for(OUTPUT_PATH)).metadata.num_rows}
+
+
+def _train(params):
+    from train_model import train_model
+
+    backend = params['backend']
+    result = train_model(backend=backend, params=TRAIN_PARAMS if backend == 'gb' else None)
+    return {'seconds': result['seconds'], 'roc_auc': result['roc_auc']}
+
+
+def _predict_single(params):
+    model, scaler = _load_artifacts()
+    X = _load_features(SINGLE_REPEATS)
+    latencies = []
+    for i in range(len(X)):
+        start = time.perf_counter()
+        model.predict_proba(scaler.transform(X.iloc[[i]]))
+        latencies.append(time.perf_counter() - start)
+    return {'seconds': statistics.median(latencies), 'p99_ms': float(np.percentile(latencies, 99) * 1000)}
+
+
+def _predict_batch(params):
+    model, scaler = _load_artifacts()
+    X = _load_features(params['batch_size'])
+    start = time.perf_counter()
+    model.predict_proba(scaler.transform(X))
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': len(X), 'claims_per_second': len(X) / seconds}
+
+
+def _explain(params, n_rows):
+    import shap
+
+    model, scaler = _load_artifacts()
+    X = scaler.transform(_load_features(n_rows))
+    start = time.perf_counter()
+    explainer = shap.TreeExplainer(model)
+    setup_seconds = time.perf_counter() - start
+    if n_rows == 1:
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            explainer.shap_values(X)
+            timings.append(time.perf_counter() - start)
+        seconds = statistics.median(timings)
+    else:
+        start = time.perf_counter()
+        explainer.shap_values(X)
+        seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'setup_seconds': setup_seconds, 'rows': len(X)}
+
+
+def _explain_single(params):
+    return _explain(params, 1)
+
+
+def _explain_batch(params):
+    return _explain(params, params['explain_batch_size'])
+
+
+STAGE_FUNCTIONS = {
+    'preprocess': _preprocess,
+    'train': _train,
+    'predict_single': _predict_single,
+    'predict_batch': _predict_batch,
+    'explain_single': _explain_single,
+    'explain_batch': _explain_batch,
+}
+
+
+def _measure(stage, params):
+    """Runs one stage in the current (fresh) process and adds wall time and memory to its result."""
+    baseline_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    result = STAGE_FUNCTIONS[stage](params)
+    result['wall_seconds'] = time.perf_counter() - start
+    result['peak_rss_mb'] = _peak_rss_mb()
+    if baseline_rss is not None:
+        result['rss_growth_mb'] = result['peak_rss_mb'] - baseline_rss
+    return result
+
+
+def _environment():
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pandas.__version__, 'sklearn': sklearn.__version__, 'machine': platform.machine(),
+            'cpu_count': os.cpu_count()}
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_regressions(run, history, threshold=0.2, window=5, metrics=('seconds', 'peak_rss_mb')):
+    """
+    Compares a run with earlier runs of the same size and backend.
+
+    For every stage and metric, the baseline is the median over the last
+    `window` comparable runs, and the run is flagged when it is more than
+    `threshold` (as a fraction) above it.
+
+    Returns:
+        list: One dict per regression with the stage, metric, value and baseline.
+    """
+    comparable = [r for r in history
+                  if r['rows'] == run['rows'] and r['backend'] == run['backend']][-window:]
+    regressions = []
+    for stage, result in run['stages'].items():
+        for metric in metrics:
+            previous = [r['stages'][stage][metric] for r in comparable
+                        if stage in r['stages'] and r['stages'][stage].get(metric) is not None]
+            if not previous or result.get(metric) is None:
+                continue
+            baseline = statistics.median(previous)
+            if result[metric] > baseline * (1 + threshold):
+                regressions.append({'stage': stage, 'metric': metric, 'value': result[metric],
+                                    'baseline': baseline, 'change': result[metric] / baseline - 1})
+    return regressions
+
+
+def run_benchmark(rows=10000, stages=STAGES, backend='gb', workdir=None, history_path=HISTORY_PATH,
+                  threshold=0.2, chunksize=None, seed=0):
+    """
+    Generates synthetic claims and times each pipeline stage on them.
+
+    Every stage runs in its own fresh process, so its peak memory is not
+    inflated by earlier stages. The run is appended to the JSON history
+    and compared with earlier runs of the same size and backend.
+
+    Args:
+        rows (int): Synthetic training claims, e.g. 10_000 to 10_000_000.
+        stages (list): Stages to run, in pipeline order. Later stages need
+            the artifacts of earlier ones in workdir.
+        backend (str): train_model() backend.
+        workdir (str, optional): Directory for the data and artifacts. A
+            temporary directory is used and removed by default.
+        history_path (str): JSON file holding all runs.
+        threshold (float): Relative slowdown or memory growth that is flagged.
+        chunksize (int, optional): Chunk size for preprocess_data(). Chunked
+            by default above a million rows.
+        seed (int): Seed for the synthetic data.
+
+    Returns:
+        dict: The run record, including any regressions.
+    """
+    from synthetic_claims import generate_claims
+
+    history_path = os.path.abspath(history_path)
+    cleanup = workdir is None
+    workdir = tempfile.mkdtemp(prefix='claims_benchmark_') if workdir is None else workdir
+    if chunksize is None and rows > 1_000_000:
+        chunksize = 500_000
+    params = {'backend': backend, 'chunksize': chunksize, 'batch_size': BATCH_SIZE,
+              'explain_batch_size': EXPLAIN_BATCH_SIZE}
+
+    cwd = os.getcwd()
+    run = {'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'rows': rows,
+           'backend': backend, 'environment': _environment(), 'stages': {}}
+    try:
+        start = time.perf_counter()
+        generate_claims(workdir, rows, seed)
+        logging.info(f"Generated {rows} synthetic claims in {time.perf_counter() - start:.1f}s.")
+
+        # Stages read and write the pipeline's default file names in the working directory
+        os.chdir(workdir)
+        for stage in stages:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(_measure, stage, params).result()
+            run['stages'][stage] = result
+            logging.info(f"{stage}: {result['seconds']:.4f}s, peak RSS {result['peak_rss_mb'] or 0:.0f} MB")
+    finally:
+        os.chdir(cwd)
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    history = load_history(history_path)
+    run['regressions'] = find_regressions(run, history, threshold)
+    for regression in run['regressions']:
+        logging.warning(f"Regression in {regression['stage']} {regression['metric']}: {regression['value']:.4g} "
+                        f"vs. baseline {regression['baseline']:.4g} (+{regression['change']:.0%})")
+    history.append(run)
+    with open(history_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    logging.info(f"Benchmark run saved to '{history_path}'.")
+    return run
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark preprocessing, training, scoring and explanation.')
+    parser.add_argument('--rows', type=int, default=10000, help='Synthetic training claims (10k to 10M).')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES, help='Stages to run.')
+    parser.add_argument('--backend', default='gb', help='Training backend.')
+    parser.add_argument('--workdir', help='Keep the generated data and artifacts in this directory.')
+    parser.add_argument('--history', default=HISTORY_PATH, help='JSON history of benchmark runs.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative change flagged as a regression.')
+    parser.add_argument('--chunksize', type=int, help='Chunk size for preprocessing.')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on regressions.')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.rows, args.stages, args.backend, args.workdir, args.history, args.threshold,
+                           args.chunksize)
+    print(f"{'stage':<16} {'seconds':>10} {'peak MB':>9}")
+    for stage, stage_result in result['stages'].items():
+        print(f"{stage:<16} {stage_result['seconds']:>10.4f} {stage_result['peak_rss_mb'] or 0:>9.0f}")
+    if args.fail_on_regression and result['regressions']:
+        raise SystemExit(1)
@@ -0,0 +1,324 @@
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from preprocess_data import INPATIENT_PATH, OUTPATIENT_PATH
+from provider_features import PHYSICIAN_COLUMNS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SKETCHES_PATH = 'claim_sketches.pkl'
+DIAGNOSIS_COLUMNS = [f'ClmDiagnosisCode_{i}' for i in range(1, 11)]
+PROCEDURE_COLUMNS = [f'ClmProcedureCode_{i}' for i in range(1, 7)]
+SKETCH_COLUMNS = ['Provider'] + PHYSICIAN_COLUMNS + DIAGNOSIS_COLUMNS + PROCEDURE_COLUMNS
+
+# Odd 64-bit constants that derive one count-min row hash per depth from a single hash
+_ROW_SEEDS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                       0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9],
+                      dtype=np.uint64)
+
+
+def _hash(values):
+    """64-bit hashes of values as strings. pandas' hash is seeded with a fixed key, so they match across processes."""
+    return pd.util.hash_array(np.asarray(values, dtype=object).astype(str))
+
+
+def _bit_length(w):
+    """Number of significant bits of each uint64 (0 for 0)."""
+    n = np.zeros(len(w), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = w >= (np.uint64(1) << np.uint64(shift))
+        n[big] += shift
+        w = np.where(big, w >> np.uint64(shift), w)
+    return n + (w > 0)
+
+
+def _long_form(chunk, key_columns, value_columns):
+    """Pairs every non-null key with every non-null value of the same claim, as two string arrays."""
+    keys, values = [], []
+    for key_column in key_columns:
+        for value_column in value_columns:
+            pair = chunk[[key_column, value_column]].dropna()
+            keys.append(pair[key_column].to_numpy(dtype=str))
+            values.append(pair[value_column].to_numpy(dtype=str))
+    if not keys:
+        return np.array([], dtype=str), np.array([], dtype=str)
+    return np.concatenate(keys), np.concatenate(values)
+
+
+class _GroupIndex:
+    """Maps group keys to dense row numbers, growing as new keys arrive."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, keys):
+        codes, uniques = pd.factorize(keys)
+        rows = np.array([self.rows.setdefault(key, len(self.rows)) for key in uniques], dtype=np.int64)
+        return rows[codes] if len(codes) else np.array([], dtype=np.int64)
+
+    def keys(self):
+        return list(self.rows)
+
+
+class GroupedHyperLogLog:
+    """
+    One HyperLogLog distinct-count sketch per group.
+
+    Each group holds 2**p one-byte registers. The top p bits of a value's
+    hash pick a register, which keeps the longest run of leading zeros seen
+    in the remaining bits. The relative error is about 1.04 / sqrt(2**p).
+    Two sketches with the same p merge by taking the register-wise maximum.
+    """
+
+    def __init__(self, p=10):
+        self.p = p
+        self.groups = _GroupIndex()
+        self.registers = np.zeros((0, 1 << p), dtype=np.uint8)
+
+    def _grow(self):
+        if len(self.groups) > len(self.registers):
+            registers = np.zeros((max(len(self.groups), 2 * len(self.registers)), 1 << self.p), dtype=np.uint8)
+            registers[:len(self.registers)] = self.registers
+            self.registers = registers
+
+    def add(self, keys, values):
+        """Adds each value to the sketch of its group."""
+        if not len(keys):
+            return
+        rows = self.groups.lookup(keys)
+        self._grow()
+        h = _hash(values)
+        bits = np.uint64(64 - self.p)
+        index = (h >> bits).astype(np.int64)
+        rank = (bits - _bit_length(h & ((np.uint64(1) << bits) - np.uint64(1))) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, (rows, index), rank)
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("Only sketches with the same precision can be merged")
+        rows = self.groups.lookup(np.array(other.groups.keys(), dtype=object))
+        self._grow()
+        self.registers[rows] = np.maximum(self.registers[rows], other.registers[:len(other.groups)])
+        return self
+
+    def count(self):
+        """Returns the estimated number of distinct values per group."""
+        registers = self.registers[:len(self.groups)].astype(np.float64)
+        m = 1 << self.p
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-registers), axis=1)
+        zeros = np.sum(registers == 0, axis=1)
+        # Linear counting is more accurate while many registers are still empty
+        small = (estimate <= 2.5 * m) & (zeros > 0)
+        estimate[small] = m * np.log(m / zeros[small])
+        return pd.Series(estimate, index=self.groups.keys())
+
+
+class GroupedTopK:
+    """
+    Approximate top-K most frequent values per group.
+
+    All (group, value) pairs share one count-min sketch with `depth` rows of
+    `width` counters, which never underestimates a count and overestimates it
+    by at most about e / width of all pairs added, with high probability.
+    Each group keeps its k best candidates, re-estimated from the sketch
+    after every update. Sketches with the same shape merge by adding
+    their counters and pooling their candidates.
+    """
+
+    def __init__(self, k=5, width=1 << 18, depth=4):
+        if width & (width - 1) or not 1 <= depth <= len(_ROW_SEEDS):
+            raise ValueError(f"width must be a power of two and depth between 1 and {len(_ROW_SEEDS)}")
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.candidates = pd.DataFrame({'key': pd.Series(dtype=object), 'value': pd.Series(dtype=object),
+                                        'count': pd.Series(dtype=np.int64)})
+
+    def _columns(self, keys, values):
+        h = _hash(keys) * np.uint64(0x100000001B3) ^ _hash(values)
+        shift = np.uint64(64 - self.width.bit_length() + 1)
+        return [((h ^ seed) * np.uint64(0xBF58476D1CE4E5B9) >> shift).astype(np.int64)
+                for seed in _ROW_SEEDS[:self.depth]]
+
+    def estimate(self, keys, values):
+        """Returns the count-min estimate for each (key, value) pair."""
+        if not len(keys):
+            return np.array([], dtype=np.int64)
+        columns = self._columns(keys, values)
+        return np.min([self.table[d, columns[d]] for d in range(self.depth)], axis=0)
+
+    def _refresh(self, pairs):
+        pairs = pd.concat([self.candidates[['key', 'value']], pairs]).drop_duplicates()
+        pairs['count'] = self.estimate(pairs['key'].to_numpy(), pairs['value'].to_numpy())
+        pairs = pairs.sort_values(['key', 'count', 'value'], ascending=[True, False, True])
+        self.candidates = pairs.groupby('key', sort=False).head(self.k).reset_index(drop=True)
+
+    def add(self, keys, values):
+        """Counts each (key, value) pair once per occurrence."""
+        if not len(keys):
+            return
+        counts = pd.DataFrame({'key': keys, 'value': values}).value_counts().reset_index()
+        columns = self._columns(counts['key'].to_numpy(), counts['value'].to_numpy())
+        for d in range(self.depth):
+            np.add.at(self.table[d], columns[d], counts['count'].to_numpy())
+        self._refresh(counts[['key', 'value']])
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Only sketches with the same width and depth can be merged")
+        self.table += other.table
+        self._refresh(other.candidates[['key', 'value']])
+        return self
+
+    def top(self):
+        """Returns the candidates as a DataFrame of key, value and estimated count, best first per key."""
+        return self.candidates.copy()
+
+
+class ClaimSketches:
+    """
+    Streaming sketches over the high-cardinality claim columns that
+    preprocess_data() drops.
+
+    Per provider it tracks the distinct physicians, diagnosis codes and
+    procedure codes and the most frequent diagnosis and procedure codes.
+    Per physician (attending, operating or other) it tracks the distinct
+    providers and diagnosis codes and the most frequent diagnosis codes.
+    Claim counts per group are kept exactly. Memory grows with the number
+    of providers and physicians, not with the number of claims, and
+    sketches built on different chunks or processes can be merged.
+
+    Args:
+        provider_p (int): HyperLogLog precision for provider sketches.
+        physician_p (int): HyperLogLog precision for physician sketches, lower
+            because there are many more physicians and few values per physician.
+        k (int): Codes kept per group in the top-K sketches.
+        width (int): Count-min counters per row.
+        depth (int): Count-min rows.
+    """
+
+    def __init__(self, provider_p=10, physician_p=7, k=5, width=1 << 18, depth=4):
+        self.provider_claims = pd.Series(dtype=np.int64)
+        self.physician_claims = pd.Series(dtype=np.int64)
+        self.provider_distinct = {name: GroupedHyperLogLog(provider_p)
+                                  for name in ('Physicians', 'Diagnoses', 'Procedures')}
+        self.physician_distinct = {name: GroupedHyperLogLog(physician_p) for name in ('Providers', 'Diagnoses')}
+        self.provider_top = {name: GroupedTopK(k, width, depth) for name in ('Diagnosis', 'Procedure')}
+        self.physician_top = {'Diagnosis': GroupedTopK(k, width, depth)}
+
+    def update(self, chunk):
+        """Adds a chunk of raw claims (any subset of the sketched columns may be present)."""
+        chunk = chunk.reindex(columns=SKETCH_COLUMNS)
+        diagnoses = [col for col in DIAGNOSIS_COLUMNS if chunk[col].notna().any()]
+        procedures = [col for col in PROCEDURE_COLUMNS if chunk[col].notna().any()]
+
+        self.provider_claims = self.provider_claims.add(chunk['Provider'].value_counts(), fill_value=0)
+        self.provider_distinct['Physicians'].add(*_long_form(chunk, ['Provider'], PHYSICIAN_COLUMNS))
+        provider_diagnoses = _long_form(chunk, ['Provider'], diagnoses)
+        provider_procedures = _long_form(chunk, ['Provider'], procedures)
+        self.provider_distinct['Diagnoses'].add(*provider_diagnoses)
+        self.provider_distinct['Procedures'].add(*provider_procedures)
+        self.provider_top['Diagnosis'].add(*provider_diagnoses)
+        self.provider_top['Procedure'].add(*provider_procedures)
+
+        physicians = pd.concat([chunk[col] for col in PHYSICIAN_COLUMNS]).dropna()
+        self.physician_claims = self.physician_claims.add(physicians.astype(str).value_counts(), fill_value=0)
+        self.physician_distinct['Providers'].add(*_long_form(chunk, PHYSICIAN_COLUMNS, ['Provider']))
+        physician_diagnoses = _long_form(chunk, PHYSICIAN_COLUMNS, diagnoses)
+        self.physician_distinct['Diagnoses'].add(*physician_diagnoses)
+        self.physician_top['Diagnosis'].add(*physician_diagnoses)
+        return self
+
+    def merge(self, other):
+        self.provider_claims = self.provider_claims.add(other.provider_claims, fill_value=0)
+        self.physician_claims = self.physician_claims.add(other.physician_claims, fill_value=0)
+        for mine, theirs in ((self.provider_distinct, other.provider_distinct),
+                             (self.physician_distinct, other.physician_distinct),
+                             (self.provider_top, other.provider_top),
+                             (self.physician_top, other.physician_top)):
+            for name, sketch in mine.items():
+                sketch.merge(theirs[name])
+        return self
+
+    @staticmethod
+    def _features(prefix, claims, distinct, top):
+        features = pd.DataFrame({f'{prefix}ClaimCount': claims.astype(np.int64)})
+        for name, sketch in distinct.items():
+            features[f'{prefix}Distinct{name}'] = sketch.count().reindex(features.index).fillna(0).round()
+        for name, sketch in top.items():
+            best = sketch.top().groupby('key')['count'].first()
+            # A code can appear in several columns of one claim, so cap the share at 1
+            share = (best.reindex(features.index).fillna(0) / features[f'{prefix}ClaimCount']).clip(upper=1)
+            features[f'{prefix}Top{name}Share'] = share
+        return features.rename_axis(prefix).reset_index()
+
+    def provider_features(self):
+        """Returns one row of sketch-based features per provider."""
+        return self._features('Provider', self.provider_claims, self.provider_distinct, self.provider_top)
+
+    def physician_features(self):
+        """Returns one row of sketch-based features per physician."""
+        return self._features('Physician', self.physician_claims, self.physician_distinct, self.physician_top)
+
+    def save(self, path=SKETCHES_PATH):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=SKETCHES_PATH):
+        return joblib.load(path)
+
+
+def _sketch_file(path, chunksize, params):
+    sketches = ClaimSketches(**params)
+    for chunk in pd.read_csv(path, usecols=lambda col: col in SKETCH_COLUMNS, dtype=str, chunksize=chunksize):
+        sketches.update(chunk)
+    return sketches
+
+
+def build_claim_sketches(paths=(INPATIENT_PATH, OUTPATIENT_PATH), output_path=SKETCHES_PATH, chunksize=100000,
+                         workers=0, **params):
+    """
+    Sketches claim files chunk by chunk, one file per worker process, and
+    merges the results.
+
+    Returns:
+        ClaimSketches: The merged sketches, also saved to output_path.
+    """
+    start = time.perf_counter()
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_sketch_file, paths, [chunksize] * len(paths), [params] * len(paths)))
+    else:
+        parts = [_sketch_file(path, chunksize, params) for path in paths]
+    sketches = parts[0]
+    for part in parts[1:]:
+        sketches.merge(part)
+    sketches.save(output_path)
+    logging.info(f"Sketched {int(sketches.provider_claims.sum())} claims from {len(paths)} files "
+                 f"in {time.perf_counter() - start:.1f}s, saved to '{output_path}'.")
+    return sketches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build distinct-count and top-K sketches over raw claim files.')
+    parser.add_argument('paths', nargs='*', default=[INPATIENT_PATH, OUTPATIENT_PATH], help='Raw claims CSVs.')
+    parser.add_argument('--output', default=SKETCHES_PATH, help='Where to save the merged sketches.')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Claims read at a time.')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (one file each).')
+    args = parser.parse_args()
+
+    # Go through the importable module so the saved sketches unpickle outside this script
+    import claim_sketches
+    claim_sketches.build_claim_sketches(args.paths, args.output, args.chunksize, args.workers)
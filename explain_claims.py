@@ -0,0 +1,189 @@
+import argparse
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import shap
+from joblib import Parallel, delayed
+
+import instrumentation
+from feature_store import ParquetAppender
+from instrumentation import stage, timed, timed_iter
+from model_bundle import BUNDLE_PATH, ModelBundle
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+EXPLANATIONS_PATH = 'claim_explanations.parquet'
+
+
+def _shap_block(explainer, X):
+    return explainer.shap_values(X).astype(np.float32)
+
+
+class ClaimExplainer:
+    """
+    Computes SHAP contributions for arrays of claims.
+
+    Each row of raw (unscaled) features is explained on the model's log-odds
+    scale. Results are kept in a bounded LRU cache keyed by the row's bytes,
+    so explaining a claim that was seen before is a dictionary lookup. Rows
+    that miss the cache are explained together, split into blocks that run
+    in parallel worker processes once the batch is large enough.
+
+    Args:
+        model: A ModelBundle, or a fitted tree model.
+        scaler: The StandardScaler a fitted model was trained behind. Not
+            needed for a bundle, whose trees split on raw features.
+        cache_size (int): Most explanations kept in memory.
+        n_jobs (int): Worker processes for large batches.
+        block_size (int): Rows explained per worker task.
+    """
+
+    def __init__(self, model, scaler=None, cache_size=4096, n_jobs=-1, block_size=5000):
+        if isinstance(model, ModelBundle):
+            self.scaler = None
+            self.explainer = shap.TreeExplainer(model.shap_model())
+            self.feature_names = model.feature_names
+        else:
+            self.scaler = scaler
+            self.explainer = shap.TreeExplainer(model)
+            self.feature_names = list(scaler.feature_names_in_)
+        self.expected_value = float(np.ravel(self.explainer.expected_value)[0])
+        self.cache_size = cache_size
+        self.n_jobs = n_jobs
+        self.block_size = block_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, bundle_path=BUNDLE_PATH, **kwargs):
+        return cls(ModelBundle.load(bundle_path), **kwargs)
+
+    @timed('explain.shap')
+    def _compute(self, X):
+        X_scaled = X if self.scaler is None else (X - self.scaler.mean_) / self.scaler.scale_
+        if len(X_scaled) < 2 * self.block_size:
+            return _shap_block(self.explainer, X_scaled)
+        blocks = [X_scaled[start:start + self.block_size] for start in range(0, len(X_scaled), self.block_size)]
+        return np.vstack(Parallel(n_jobs=self.n_jobs)(delayed(_shap_block)(self.explainer, block) for block in blocks))
+
+    def explain(self, X):
+        """
+        Returns a float32 array of shape (n, n_features) with each claim's
+        SHAP values, serving repeated feature vectors from the cache.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected an array of shape (n, {len(self.feature_names)})")
+        keys = [row.tobytes() for row in X]
+        values = np.empty(X.shape, dtype=np.float32)
+
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    values[i] = self._cache[key]
+                else:
+                    missing.setdefault(key, []).append(i)
+            self.hits += len(keys) - sum(len(rows) for rows in missing.values())
+            self.misses += len(missing)
+        if not missing:
+            return values
+
+        first_rows = [rows[0] for rows in missing.values()]
+        computed = self._compute(X[first_rows])
+        with self._lock:
+            for (key, rows), row_values in zip(missing.items(), computed):
+                values[rows] = row_values
+                if self.cache_size:
+                    self._cache[key] = row_values
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return values
+
+    def explanation(self, x, values=None):
+        """Builds a shap.Explanation for one claim, for waterfall and similar plots."""
+        x = np.asarray(x, dtype=np.float64)
+        if values is None:
+            values = self.explain(x[None, :])[0]
+        return shap.Explanation(values=values, base_values=self.expected_value, data=x,
+                                feature_names=self.feature_names)
+
+
+@timed('explain')
+def explain_claims(input_path, output_path=EXPLANATIONS_PATH, chunksize=100000, bundle_path=BUNDLE_PATH, n_jobs=-1):
+    """
+    Explains every claim in a file and stores the contribution vectors.
+
+    The input is a CSV or Parquet file with the model features and an
+    optional ClaimID. The output is a Parquet file with the ClaimID (when
+    present) and one float32 column of SHAP values per feature; the
+    explainer's expected value and the model version are kept in the
+    file's metadata.
+
+    Returns:
+        dict: The number of claims explained and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    with stage('explain.load_artifacts'):
+        bundle = ModelBundle.load(bundle_path)
+        explainer = ClaimExplainer(bundle, cache_size=0, n_jobs=n_jobs)
+    if input_path.endswith('.parquet'):
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunksize))
+    else:
+        chunks = pd.read_csv(input_path, chunksize=chunksize)
+
+    appender = ParquetAppender(output_path, compact=False,
+                               metadata={'expected_value': str(explainer.expected_value),
+                                         'model_version': bundle.content_hash})
+    n_claims = 0
+    try:
+        for chunk in timed_iter('explain.read', chunks):
+            values = explainer.explain(chunk[explainer.feature_names].to_numpy(dtype=np.float64))
+            with stage('explain.write', rows=len(values)):
+                out = pd.DataFrame(values, columns=explainer.feature_names)
+                if 'ClaimID' in chunk.columns:
+                    out.insert(0, 'ClaimID', chunk['ClaimID'].to_numpy())
+                appender.write(out)
+            n_claims += len(out)
+            logging.info(f"Explained {n_claims} claims...")
+    finally:
+        appender.close()
+
+    seconds = time.perf_counter() - start
+    logging.info(f"Explained {n_claims} claims in {seconds:.1f}s, saved to '{output_path}'.")
+    return {'claims': n_claims, 'seconds': seconds}
+
+
+def load_explanations(path=EXPLANATIONS_PATH, claim_ids=None):
+    """
+    Reads stored contribution vectors, optionally only for some claims.
+
+    Returns:
+        tuple: (DataFrame of SHAP values, expected value).
+    """
+    filters = [('ClaimID', 'in', list(claim_ids))] if claim_ids is not None else None
+    table = pq.read_table(path, filters=filters)
+    return table.to_pandas(), float(table.schema.metadata[b'expected_value'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute SHAP explanations for a file of claims.')
+    parser.add_argument('input', help='CSV or Parquet file with the model features and an optional ClaimID.')
+    parser.add_argument('output', nargs='?', default=EXPLANATIONS_PATH, help='Parquet file for the explanations.')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Claims read at a time.')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Worker processes.')
+    parser.add_argument('--bundle', default=BUNDLE_PATH, help='Model bundle.')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumentation.session(args):
+        explain_claims(args.input, args.output, args.chunksize, args.bundle, args.n_jobs)
@@ -0,0 +1,113 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CLEANED_DATA_PATH = 'claims_cleaned_data.csv'
+
+# 0/1 flags are stored as int8, the encoded Provider as int32 and amounts as float32
+FLAG_COLUMNS = ['RenalDiseaseIndicator', 'ChronicCond_Alzheimer', 'ChronicCond_Heartfailure',
+                'ChronicCond_KidneyDisease', 'ChronicCond_Cancer', 'ChronicCond_ObstrPulmonary',
+                'ChronicCond_Depression', 'ChronicCond_Diabetes', 'ChronicCond_IschemicHeart',
+                'ChronicCond_Osteoporasis', 'ChronicCond_rheumatoidarthritis', 'ChronicCond_stroke',
+                'PotentialFraud']
+AMOUNT_COLUMNS = ['InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt', 'IPAnnualDeductibleAmt',
+                  'OPAnnualReimbursementAmt', 'OPAnnualDeductibleAmt', 'TotalReimbursement']
+
+
+def parquet_path_for(path):
+    """Returns the Parquet file that sits next to a cleaned CSV."""
+    return os.path.splitext(path)[0] + '.parquet'
+
+
+def provider_encoding_path_for(path):
+    """Returns the JSON file with the Provider encoding of a cleaned CSV."""
+    return os.path.splitext(path)[0] + '.providers.json'
+
+
+def save_provider_encoding(providers, path):
+    """Writes Provider IDs, in code order, as a JSON object of ID -> code."""
+    with open(path, 'w') as f:
+        json.dump({str(provider): code for code, provider in enumerate(providers)}, f)
+
+
+def load_provider_encoding(path):
+    """Reads a Provider encoding written by save_provider_encoding(), or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compact_dtypes(df):
+    """
+    Casts the cleaned columns to compact dtypes. Columns that are not
+    known flags, amounts or the Provider code are left unchanged.
+    """
+    dtypes = {col: 'int8' for col in FLAG_COLUMNS if col in df.columns}
+    dtypes.update({col: 'float32' for col in AMOUNT_COLUMNS if col in df.columns})
+    if 'Provider' in df.columns:
+        dtypes['Provider'] = 'int32'
+    return df.astype(dtypes)
+
+
+class ParquetAppender:
+    """
+    Appends DataFrames to one Parquet file, one row group per call.
+    The schema is fixed by the first frame written.
+
+    Args:
+        path (str): The Parquet file to write.
+        compact (bool): Whether to apply compact_dtypes() to each frame.
+        metadata (dict, optional): Extra key/value strings stored in the file's schema.
+    """
+
+    def __init__(self, path, compact=True, metadata=None):
+        self.path = path
+        self.compact = compact
+        self.metadata = metadata
+        self.schema = None
+        self._writer = None
+
+    def write(self, df):
+        if self.compact:
+            df = compact_dtypes(df)
+        if self._writer is None:
+            self.schema = pa.Schema.from_pandas(df, preserve_index=False)
+            if self.metadata:
+                self.schema = self.schema.with_metadata({**self.schema.metadata, **self.metadata})
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def write_cleaned_data(df, path=CLEANED_DATA_PATH):
+    """Writes the cleaned data to Parquet with compact dtypes."""
+    compact_dtypes(df).to_parquet(parquet_path_for(path), index=False)
+
+
+def load_cleaned_data(path=CLEANED_DATA_PATH, columns=None):
+    """
+    Loads the cleaned claims data.
+
+    The Parquet copy is read when it exists and is not older than the CSV,
+    otherwise the CSV is read as a fallback. Either way only the requested
+    columns are loaded and compact dtypes are applied.
+
+    Args:
+        path (str): The path to the cleaned claims data (.csv or .parquet).
+        columns (list, optional): The columns to load. All columns by default.
+
+    Raises:
+        FileNotFoundError: If neither the Parquet file nor the CSV exists.
+    """
+    parquet_path = path if path.endswith('.parquet') else parquet_path_for(path)
+    if os.path.exists(parquet_path) and (
+            not os.path.exists(path) or os.path.getmtime(parquet_path) >= os.path.getmtime(path)):
+        return pd.read_parquet(parquet_path, columns=columns)
+    return compact_dtypes(pd.read_csv(path, usecols=columns))
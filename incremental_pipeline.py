@@ -0,0 +1,228 @@
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import time
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.model_selection import train_test_split
+
+from feature_store import ParquetAppender
+from model_bundle import bundle_path_for, save_bundle
+from preprocess_data import (BENEFICIARY_PATH, TRAIN_PATH, build_beneficiary_lookup, build_provider_lookup,
+                             encode_claims, join_claims)
+from train_model import MODEL_PATH, SCALER_PATH, TOP_FEATURES, train_model
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+STORE_DIR = 'claims_store'
+MANIFEST_NAME = 'manifest.json'
+PROVIDER_ENCODING_NAME = 'provider_encoding.json'
+CLAIM_FILE_PATTERN = '*patient*.csv'
+STORE_COLUMNS = TOP_FEATURES + ['PotentialFraud']
+
+
+class ProviderEncoder:
+    """
+    A Provider label encoding that only ever grows.
+
+    Codes that were handed out are never changed. Providers seen for the
+    first time get the next free codes, in sorted order, so the first batch
+    is numbered exactly like LabelEncoder would number it.
+    """
+
+    def __init__(self, mapping=None):
+        self.mapping = dict(mapping or {})
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.mapping, f)
+
+    def encode(self, providers):
+        """Returns int32 codes for a Series of provider IDs, extending the mapping as needed."""
+        for provider in sorted(set(providers.unique()) - self.mapping.keys()):
+            self.mapping[provider] = len(self.mapping)
+        return providers.map(self.mapping).astype('int32')
+
+
+def _load_manifest(store_dir):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'partitions': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(store_dir, manifest):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def ingest_new_files(incoming_dir, store_dir=STORE_DIR, beneficiary_path=BENEFICIARY_PATH, train_path=TRAIN_PATH,
+                     pattern=CLAIM_FILE_PATTERN, chunksize=100000):
+    """
+    Cleans claim files that have not been ingested yet into one Parquet
+    partition each.
+
+    A file counts as ingested when the manifest already holds an entry with
+    the same name, size and modification time. Provider IDs are encoded
+    with the store's ProviderEncoder instead of being re-fitted, so codes
+    stay the same across batches.
+
+    Args:
+        incoming_dir (str): Directory that receives the monthly claim files.
+        store_dir (str): Directory holding the partitions, manifest and Provider encoding.
+        beneficiary_path (str): Raw beneficiary CSV.
+        train_path (str): Raw provider label CSV.
+        pattern (str): Glob pattern for claim files in incoming_dir.
+        chunksize (int): Claims read at a time.
+
+    Returns:
+        list: Manifest entries of the partitions written by this call.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = _load_manifest(store_dir)
+    seen = {(p['file'], p['size'], p['mtime']) for p in manifest['partitions']}
+
+    new_files = []
+    for name in sorted(os.listdir(incoming_dir)):
+        path = os.path.join(incoming_dir, name)
+        if fnmatch.fnmatch(name, pattern):
+            stat = os.stat(path)
+            if (name, stat.st_size, stat.st_mtime) not in seen:
+                new_files.append((name, path, stat))
+    if not new_files:
+        logging.info("No new claim files to ingest.")
+        return []
+
+    encoder_path = os.path.join(store_dir, PROVIDER_ENCODING_NAME)
+    encoder = ProviderEncoder.load(encoder_path)
+    beneficiary_lookup = build_beneficiary_lookup(pd.read_csv(beneficiary_path))
+    provider_lookup = build_provider_lookup(pd.read_csv(train_path))
+
+    written = []
+    for name, path, stat in new_files:
+        start = time.perf_counter()
+        partition = f"partition={os.path.splitext(name)[0]}"
+        os.makedirs(os.path.join(store_dir, partition), exist_ok=True)
+        appender = ParquetAppender(os.path.join(store_dir, partition, 'part-00000.parquet'))
+        rows = 0
+        try:
+            for chunk in pd.read_csv(path, chunksize=chunksize):
+                joined = join_claims(chunk, beneficiary_lookup, provider_lookup)
+                joined['Provider'] = encoder.encode(joined['Provider'])
+                df = encode_claims(joined)[STORE_COLUMNS]
+                if len(df):
+                    appender.write(df)
+                    rows += len(df)
+        finally:
+            appender.close()
+        if rows == 0:
+            os.rmdir(os.path.join(store_dir, partition))
+
+        entry = {'file': name, 'size': stat.st_size, 'mtime': stat.st_mtime, 'partition': partition if rows else None,
+                 'rows': rows, 'trained': False}
+        manifest['partitions'] = [p for p in manifest['partitions'] if p['file'] != name] + [entry]
+        encoder.save(encoder_path)
+        _save_manifest(store_dir, manifest)
+        written.append(entry)
+        logging.info(f"Ingested {name}: {rows} claims in {time.perf_counter() - start:.1f}s.")
+    return written
+
+
+def load_partitions(store_dir=STORE_DIR, partitions=None, columns=STORE_COLUMNS):
+    """Loads the given partitions (all by default) into one DataFrame."""
+    if partitions is None:
+        partitions = [p['partition'] for p in _load_manifest(store_dir)['partitions'] if p['partition']]
+    frames = [pd.read_parquet(os.path.join(store_dir, partition), columns=columns) for partition in partitions]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def retrain(store_dir=STORE_DIR, mode='warm_start', n_new_estimators=20, window=3, backend='gb',
+            model_path=MODEL_PATH, scaler_path=SCALER_PATH):
+    """
+    Updates the model from the partitioned store without reprocessing history.
+
+    'warm_start' loads the current GradientBoostingClassifier and adds
+    n_new_estimators boosting stages fitted only on partitions that have not
+    been trained on yet; the scaler is kept as is so the existing trees stay
+    valid. 'window' trains a fresh model on the newest `window` partitions.
+    Either way the cost follows the new batch or the window, not the history,
+    and the model bundle next to model_path is rebuilt with the store's
+    Provider encoding.
+
+    Returns:
+        dict: The mode, number of rows trained on and elapsed seconds, or
+        None if there was nothing to train on.
+    """
+    start = time.perf_counter()
+    manifest = _load_manifest(store_dir)
+    provider_encoding = ProviderEncoder.load(os.path.join(store_dir, PROVIDER_ENCODING_NAME)).mapping
+    entries = [p for p in manifest['partitions'] if p['partition']]
+
+    if mode == 'warm_start':
+        entries = [p for p in entries if not p['trained']]
+        if not entries:
+            logging.info("No new partitions to train on.")
+            return None
+        df = load_partitions(store_dir, [p['partition'] for p in entries])
+        model = joblib.load(model_path)
+        scaler = joblib.load(scaler_path)
+        if not isinstance(model, GradientBoostingClassifier):
+            raise ValueError("Warm-start retraining needs a GradientBoostingClassifier; use mode='window'")
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + n_new_estimators)
+        model.fit(scaler.transform(df[TOP_FEATURES]), df['PotentialFraud'])
+        joblib.dump(model, model_path)
+        save_bundle(model, scaler, bundle_path_for(model_path), provider_encoding, {'backend': 'gb'})
+        logging.info(f"Added {n_new_estimators} boosting stages on {len(df)} new claims.")
+    elif mode == 'window':
+        entries = entries[-window:]
+        if not entries:
+            logging.info("No partitions to train on.")
+            return None
+        df = load_partitions(store_dir, [p['partition'] for p in entries])
+        split = train_test_split(df[TOP_FEATURES], df['PotentialFraud'], test_size=0.2,
+                                 stratify=df['PotentialFraud'], random_state=42)
+        train_model(backend=backend, model_path=model_path, scaler_path=scaler_path, split=split,
+                    provider_encoding=provider_encoding)
+    else:
+        raise ValueError("mode must be 'warm_start' or 'window'")
+
+    trained = {p['file'] for p in entries}
+    for p in manifest['partitions']:
+        if p['file'] in trained:
+            p['trained'] = True
+    _save_manifest(store_dir, manifest)
+    return {'mode': mode, 'rows': len(df), 'seconds': time.perf_counter() - start}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest new claim files and retrain incrementally.')
+    parser.add_argument('incoming', help='Directory that receives the monthly claim files.')
+    parser.add_argument('--store', default=STORE_DIR, help='Partitioned claims store.')
+    parser.add_argument('--beneficiary', default=BENEFICIARY_PATH, help='Raw beneficiary CSV.')
+    parser.add_argument('--providers', default=TRAIN_PATH, help='Raw provider label CSV.')
+    parser.add_argument('--mode', default='warm_start', choices=['warm_start', 'window'])
+    parser.add_argument('--new-estimators', type=int, default=20, help='Boosting stages added per warm start.')
+    parser.add_argument('--window', type=int, default=3, help='Partitions used by the sliding window.')
+    parser.add_argument('--backend', default='gb', help="Training backend for mode 'window'.")
+    args = parser.parse_args()
+
+    ingest_new_files(args.incoming, args.store, args.beneficiary, args.providers)
+    retrain(args.store, mode=args.mode, n_new_estimators=args.new_estimators, window=args.window,
+            backend=args.backend)
@@ -0,0 +1,336 @@
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Settings are mirrored in environment variables so worker processes and
+# `streamlit run` pick them up, e.g. CLAIMS_METRICS_PATH=metrics.jsonl
+METRICS_ENV = 'CLAIMS_METRICS_PATH'
+TRACEMALLOC_ENV = 'CLAIMS_TRACEMALLOC'
+PROFILE_DIR_ENV = 'CLAIMS_PROFILE_DIR'
+MAX_RECORDS = 10000
+MB = 1024 * 1024
+
+_config = {
+    'metrics_path': os.environ.get(METRICS_ENV) or None,
+    'profile_dir': os.environ.get(PROFILE_DIR_ENV) or None,
+}
+_records = deque(maxlen=MAX_RECORDS)
+_totals = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+if os.environ.get(TRACEMALLOC_ENV) == '1' and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def _rss():
+    """Current resident set size in bytes, or None where /proc is not available."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+
+def _peak_rss():
+    """The process's resident set size high-water mark in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def _mb(value):
+    return None if value is None else round(value / MB, 3)
+
+
+def configure(metrics_path=None, tracemalloc_enabled=None, profile_dir=None):
+    """
+    Sets where stage records go and which optional measurements are taken.
+
+    Args:
+        metrics_path (str, optional): JSON-lines file every finished stage is
+            appended to. Worker processes started afterwards append to it too.
+        tracemalloc_enabled (bool, optional): Trace Python allocations to
+            report per-stage allocation deltas and peaks. This slows
+            allocation-heavy code down noticeably, so it is off by default.
+        profile_dir (str, optional): Dump a cProfile .prof file for every
+            outermost stage into this directory.
+    """
+    if metrics_path is not None:
+        _config['metrics_path'] = metrics_path
+        os.environ[METRICS_ENV] = metrics_path
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+        _config['profile_dir'] = profile_dir
+        os.environ[PROFILE_DIR_ENV] = profile_dir
+    if tracemalloc_enabled is not None:
+        os.environ[TRACEMALLOC_ENV] = '1' if tracemalloc_enabled else '0'
+        if tracemalloc_enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not tracemalloc_enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class Stage:
+    """
+    A running stage. Set `rows` (and any other label in `labels`) while it
+    runs; the record is written when the stage exits.
+    """
+
+    def __init__(self, name, rows=None, labels=None):
+        self.name = name
+        self.rows = rows
+        self.labels = labels or {}
+        self.record = None
+        self._child_peak = 0
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def stage(name, rows=None, **labels):
+    """
+    Times a block and records its memory use.
+
+    Each record holds the wall-clock seconds, the row count, the RSS after
+    the stage and its change, the growth of the process's peak RSS and, when
+    tracemalloc is on, the traced allocation delta and peak within the
+    stage. Stages nest; a record names its enclosing stage as `parent`.
+
+        with stage('train.fit', rows=len(X_train)):
+            model.fit(X_train, y_train)
+
+    Yields:
+        Stage: Set its `rows` attribute if the count is only known later.
+    """
+    current = Stage(name, rows, labels)
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    stack.append(current)
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        traced_start, outer_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+    profiler = None
+    if _config['profile_dir'] and parent is None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is already active
+            profiler = None
+
+    rss_start, peak_start = _rss(), _peak_rss()
+    timestamp = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+        stack.pop()
+        rss_end, peak_end = _rss(), _peak_rss()
+        record = {'stage': name, 'timestamp': round(timestamp, 6), 'seconds': seconds, 'rows': current.rows,
+                  'rss_mb': _mb(rss_end),
+                  'rss_delta_mb': _mb(rss_end - rss_start) if rss_end is not None and rss_start is not None else None,
+                  'peak_rss_mb': _mb(peak_end),
+                  'peak_rss_delta_mb': _mb(peak_end - peak_start) if peak_end is not None else None,
+                  'parent': parent.name if parent is not None else None, 'pid': os.getpid()}
+        if tracing and tracemalloc.is_tracing():
+            traced_end, peak = tracemalloc.get_traced_memory()
+            # reset_peak() in nested stages hides their peak from this one, so they report it back
+            peak = max(peak, current._child_peak)
+            record['tracemalloc_delta_mb'] = _mb(traced_end - traced_start)
+            record['tracemalloc_peak_mb'] = _mb(peak - traced_start)
+            if parent is not None:
+                parent._child_peak = max(parent._child_peak, peak, outer_peak)
+        if profiler is not None:
+            record['profile'] = os.path.join(_config['profile_dir'], f'{name}-{os.getpid()}-{int(timestamp * 1000)}.prof')
+            profiler.dump_stats(record['profile'])
+        if error is not None:
+            record['error'] = error
+        record.update(current.labels)
+        current.record = record
+        _add_record(record)
+
+
+def _add_record(record):
+    with _lock:
+        _records.append(record)
+        totals = _totals.setdefault(record['stage'], {'calls': 0, 'seconds': 0.0, 'rows': 0, 'errors': 0,
+                                                      'peak_rss_mb': None, 'tracemalloc_peak_mb': None})
+        totals['calls'] += 1
+        totals['seconds'] += record['seconds']
+        totals['rows'] += record['rows'] or 0
+        totals['errors'] += 'error' in record
+        for key in ('peak_rss_mb', 'tracemalloc_peak_mb'):
+            if record.get(key) is not None:
+                totals[key] = max(totals[key] or 0, record[key])
+        if _config['metrics_path']:
+            # One write per line so records from several processes don't interleave
+            with open(_config['metrics_path'], 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+    logging.debug(f"Stage '{record['stage']}' took {record['seconds']:.4f}s for {record['rows']} rows.")
+
+
+def timed(name):
+    """
+    Decorator form of stage(). When the function returns something with a
+    `shape` (a DataFrame or array), its length is recorded as the row count.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as current:
+                result = func(*args, **kwargs)
+                if current.rows is None and hasattr(result, 'shape') and len(result.shape):
+                    current.rows = result.shape[0]
+                return result
+        return wrapper
+    return decorator
+
+
+def timed_iter(name, iterable):
+    """
+    Yields from an iterable, recording each step as a stage, e.g. the time
+    spent reading every chunk of a CSV file.
+    """
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as current:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                current.labels['exhausted'] = True
+                return
+            if hasattr(item, 'shape') and len(item.shape):
+                current.rows = item.shape[0]
+        yield item
+
+
+def records():
+    """Returns the most recent stage records of this process, oldest first."""
+    with _lock:
+        return list(_records)
+
+
+def clear():
+    """Forgets the records and totals of this process."""
+    with _lock:
+        _records.clear()
+        _totals.clear()
+
+
+def write_jsonl(path):
+    """Writes this process's records to a JSON-lines file."""
+    with open(path, 'w') as f:
+        for record in records():
+            f.write(json.dumps(record, default=str) + '\n')
+
+
+def to_prometheus():
+    """
+    Renders the per-stage totals of this process in the Prometheus text
+    exposition format: call, second, row and error counters plus the highest
+    peak RSS and traced allocation peak seen per stage.
+    """
+    metrics = [
+        ('claims_stage_calls_total', 'counter', 'Times each pipeline stage ran.', 'calls', 1),
+        ('claims_stage_seconds_total', 'counter', 'Wall-clock seconds spent in each pipeline stage.', 'seconds', 1),
+        ('claims_stage_rows_total', 'counter', 'Rows processed by each pipeline stage.', 'rows', 1),
+        ('claims_stage_errors_total', 'counter', 'Pipeline stage runs that raised an exception.', 'errors', 1),
+        ('claims_stage_peak_rss_bytes', 'gauge', 'Highest process peak RSS seen at the end of a stage.',
+         'peak_rss_mb', MB),
+        ('claims_stage_tracemalloc_peak_bytes', 'gauge', 'Highest traced allocation peak within a stage.',
+         'tracemalloc_peak_mb', MB),
+    ]
+    with _lock:
+        totals = {name: dict(values) for name, values in _totals.items()}
+    lines = []
+    for metric, kind, help_text, key, scale in metrics:
+        samples = [(name, values[key]) for name, values in sorted(totals.items()) if values[key] is not None]
+        if not samples:
+            continue
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for name, value in samples:
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{metric}{{stage="{label}"}} {value * scale:.6g}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    """Writes to_prometheus() to a file, e.g. for the node exporter's textfile collector."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+def log_summary():
+    """Logs the per-stage totals of this process, slowest first."""
+    with _lock:
+        totals = sorted(_totals.items(), key=lambda item: -item[1]['seconds'])
+    if not totals:
+        return
+    lines = [f"{'stage':<28} {'calls':>6} {'seconds':>10} {'rows':>10} {'peak MB':>9}"]
+    for name, values in totals:
+        lines.append(f"{name:<28} {values['calls']:>6} {values['seconds']:>10.3f} {values['rows']:>10} "
+                     f"{values['peak_rss_mb'] or 0:>9.0f}")
+    logging.info("Stage timings:\n" + '\n'.join(lines))
+
+
+def add_arguments(parser):
+    """Adds the instrumentation options to a script's argument parser."""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--metrics', help='Append per-stage timing and memory records to this JSON-lines file.')
+    group.add_argument('--prometheus', help='Write per-stage totals in Prometheus text format to this file.')
+    group.add_argument('--profile-dir', help='Dump a cProfile file for the run into this directory.')
+    group.add_argument('--tracemalloc', action='store_true', help='Report traced Python allocations per stage.')
+    group.add_argument('--timings', action='store_true', help='Log a per-stage timing summary at the end.')
+
+
+@contextmanager
+def session(args):
+    """
+    Applies the add_arguments() options around a script's main call and
+    writes the summaries when it finishes.
+    """
+    configure(args.metrics, args.tracemalloc or None, args.profile_dir)
+    try:
+        yield
+    finally:
+        if args.timings:
+            log_summary()
+        if args.prometheus:
+            write_prometheus(args.prometheus)
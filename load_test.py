@@ -0,0 +1,83 @@
+import argparse
+import json
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+
+import numpy as np
+
+# A single claim with every model feature, taken from sample_fraudulent.txt
+SAMPLE_CLAIM = {
+    'ClaimID': 'CLM-LOADTEST', 'Provider': 0, 'InscClaimAmtReimbursed': 50000, 'IPAnnualReimbursementAmt': 100000,
+    'IPAnnualDeductibleAmt': 1000, 'TotalReimbursement': 150000, 'RenalDiseaseIndicator': 1,
+    'ChronicCond_Alzheimer': 1, 'ChronicCond_Heartfailure': 1, 'ChronicCond_KidneyDisease': 1,
+    'ChronicCond_Cancer': 0, 'ChronicCond_ObstrPulmonary': 0, 'ChronicCond_Depression': 0,
+    'ChronicCond_Diabetes': 0, 'ChronicCond_IschemicHeart': 0, 'ChronicCond_Osteoporasis': 0,
+    'ChronicCond_rheumatoidarthritis': 0, 'ChronicCond_stroke': 0
+}
+
+
+def run_load_test(url='http://127.0.0.1:8000', concurrency=16, requests_per_client=200):
+    """
+    Sends single-claim requests from concurrent clients and reports latency.
+
+    Args:
+        url (str): Base URL of a running scoring server.
+        concurrency (int): Number of client threads, each with its own keep-alive connection.
+        requests_per_client (int): Requests sent by each client.
+
+    Returns:
+        dict: Request count, errors, requests per second and p50/p99 latency in ms.
+    """
+    target = urlparse(url)
+    body = json.dumps(SAMPLE_CLAIM)
+    headers = {'Content-Type': 'application/json'}
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def client(i):
+        conn = HTTPConnection(target.hostname, target.port or 80)
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            try:
+                conn.request('POST', '/score', body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[i] += 1
+            except OSError:
+                errors[i] += 1
+                conn.close()
+            latencies[i].append(time.perf_counter() - start)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = np.concatenate(latencies) * 1000
+    return {
+        'requests': len(all_latencies),
+        'errors': sum(errors),
+        'requests_per_second': len(all_latencies) / elapsed,
+        'p50_ms': float(np.percentile(all_latencies, 50)),
+        'p99_ms': float(np.percentile(all_latencies, 99)),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test a running scoring server.')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per client.')
+    args = parser.parse_args()
+
+    stats = run_load_test(args.url, args.concurrency, args.requests)
+    print(f"{stats['requests']} requests, {stats['errors']} errors")
+    print(f"Throughput: {stats['requests_per_second']:.0f} requests/s")
+    print(f"Latency: p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
@@ -0,0 +1,280 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from tree_engine import TreeEnsemble
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BUNDLE_PATH = 'claims_fraud_detection.bundle'
+FORMAT_VERSION = 1
+MAGIC = b'CLMBNDL\x00'
+ALIGNMENT = 64
+
+# Arrays stored in the bundle, in file order
+ARRAY_NAMES = ['mean', 'scale', 'feature', 'threshold', 'children', 'value', 'roots', 'cover', 'provider_ids']
+
+
+def bundle_path_for(model_path):
+    """Returns the bundle that sits next to a model pickle."""
+    return os.path.splitext(model_path)[0] + '.bundle'
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _content_hash(header, arrays):
+    """
+    SHA-256 over the schema and the bytes of every array. The metadata is
+    left out, so the same model always gets the same hash.
+    """
+    schema = {key: value for key, value in header.items() if key not in ('metadata', 'content_hash')}
+    digest = hashlib.sha256(json.dumps(schema, sort_keys=True).encode('utf-8'))
+    for name in ARRAY_NAMES:
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()
+
+
+class ModelBundle:
+    """
+    Everything needed to score and explain claims, in one file.
+
+    The bundle holds the ordered feature schema, the StandardScaler's mean
+    and scale, the trees flattened as in tree_engine.TreeEnsemble (with the
+    scaler folded into the thresholds, so raw features are scored directly),
+    each node's training cover for SHAP, the Provider encoding and a
+    SHA-256 content hash that identifies the model version.
+
+    On disk it is a JSON header followed by the raw arrays, each aligned to
+    64 bytes. load() memory-maps the arrays instead of reading them, so
+    opening a bundle costs the same for any model size and all processes
+    that load it share one physical copy through the page cache. Unlike the
+    separate model and scaler pickles, the scaler and trees cannot come from
+    different training runs.
+    """
+
+    def __init__(self, feature_names, mean, scale, ensemble, cover, provider_ids=(), metadata=None,
+                 content_hash=None):
+        self.feature_names = list(feature_names)
+        self.mean = mean
+        self.scale = scale
+        self.ensemble = ensemble
+        self.cover = cover
+        self.provider_ids = np.asarray(provider_ids, dtype=str)
+        self.metadata = dict(metadata or {})
+        self.content_hash = content_hash
+        self._provider_index = None
+
+    @classmethod
+    def from_model(cls, model, scaler, provider_encoding=None, metadata=None):
+        """
+        Builds a bundle from a fitted GradientBoostingClassifier and the
+        StandardScaler it was trained behind.
+
+        Args:
+            provider_encoding (dict, optional): Provider ID -> code used in
+                training, e.g. from preprocess_data() or ProviderEncoder.
+            metadata (dict, optional): Extra JSON-serializable information.
+
+        Raises:
+            ValueError: If the model is not a binary GradientBoostingClassifier.
+        """
+        if not hasattr(model, 'estimators_'):
+            raise ValueError(f"Only GradientBoostingClassifier models can be bundled, not {type(model).__name__}")
+        ensemble = TreeEnsemble.from_model(model, scaler)
+
+        # Node covers in the same breadth-first order as TreeEnsemble.from_model()
+        covers = []
+        for estimator in model.estimators_[:, 0]:
+            tree = estimator.tree_
+            order = [0]
+            for node in order:
+                if tree.children_left[node] != -1:
+                    order.extend([tree.children_left[node], tree.children_right[node]])
+            covers.append(tree.weighted_n_node_samples[order])
+
+        provider_ids = ()
+        if provider_encoding:
+            codes = np.array(list(provider_encoding.values()))
+            if not np.array_equal(np.sort(codes), np.arange(len(codes))):
+                raise ValueError("Provider codes must be 0..n-1")
+            provider_ids = np.empty(len(codes), dtype=object)
+            provider_ids[codes] = list(provider_encoding.keys())
+
+        info = {'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'n_trees': len(ensemble.roots), 'n_nodes': len(ensemble.value)}
+        info.update(metadata or {})
+        return cls(list(scaler.feature_names_in_), np.asarray(scaler.mean_, dtype=np.float64),
+                   np.asarray(scaler.scale_, dtype=np.float64), ensemble, np.concatenate(covers),
+                   provider_ids, info)
+
+    def _arrays(self):
+        return {'mean': self.mean, 'scale': self.scale, 'feature': self.ensemble.feature,
+                'threshold': self.ensemble.threshold, 'children': self.ensemble.children,
+                'value': self.ensemble.value, 'roots': self.ensemble.roots, 'cover': self.cover,
+                'provider_ids': self.provider_ids}
+
+    def save(self, path=BUNDLE_PATH):
+        """
+        Writes the bundle atomically and returns its content hash.
+        """
+        arrays = {name: np.ascontiguousarray(array) for name, array in self._arrays().items()}
+        header = {'format_version': FORMAT_VERSION, 'feature_names': self.feature_names,
+                  'init_raw': self.ensemble.init_raw, 'max_depth': self.ensemble.max_depth,
+                  'metadata': self.metadata, 'arrays': {}}
+        # Offsets are relative to the start of the data section, so they do not depend on the header size
+        offset = 0
+        for name in ARRAY_NAMES:
+            array = arrays[name]
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset = _aligned(offset + array.nbytes)
+        header['content_hash'] = _content_hash(header, arrays)
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header_bytes).to_bytes(8, 'little'))
+            f.write(header_bytes)
+            for name in ARRAY_NAMES:
+                f.write(b'\0' * (data_start + header['arrays'][name]['offset'] - f.tell()))
+                f.write(arrays[name].tobytes())
+        os.replace(tmp_path, path)
+        self.content_hash = header['content_hash']
+        return self.content_hash
+
+    @classmethod
+    def load(cls, path=BUNDLE_PATH, verify=False):
+        """
+        Memory-maps a bundle. The arrays are read-only views of the file.
+
+        Args:
+            verify (bool): Recompute the content hash, which reads every page.
+
+        Raises:
+            ValueError: If the file is not a bundle, has an unsupported
+                version or, with verify, does not match its hash.
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not a model bundle")
+            header = json.loads(f.read(int.from_bytes(f.read(8), 'little')))
+            if header['format_version'] > FORMAT_VERSION:
+                raise ValueError(f"'{path}' has bundle format {header['format_version']}, "
+                                 f"this version reads up to {FORMAT_VERSION}")
+            data_start = _aligned(f.tell())
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape']))
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                         offset=data_start + spec['offset']).reshape(spec['shape'])
+
+        content_hash = header.pop('content_hash')
+        if verify and _content_hash(header, arrays) != content_hash:
+            raise ValueError(f"'{path}' does not match its content hash")
+        ensemble = TreeEnsemble(arrays['feature'], arrays['threshold'], arrays['children'], arrays['value'],
+                                arrays['roots'], header['init_raw'], header['max_depth'], header['feature_names'])
+        return cls(header['feature_names'], arrays['mean'], arrays['scale'], ensemble, arrays['cover'],
+                   arrays['provider_ids'], header['metadata'], content_hash)
+
+    @property
+    def version(self):
+        """Short form of the content hash."""
+        return self.content_hash[:12] if self.content_hash else None
+
+    def predict_proba(self, X):
+        """Class probabilities for raw (unscaled) features, like model.predict_proba(scaler.transform(X))."""
+        return self.ensemble.predict_proba(X)
+
+    def transform(self, X):
+        """Scales raw features like the StandardScaler the model was trained behind."""
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def encode_providers(self, providers):
+        """
+        Maps Provider IDs to the codes used in training. Providers that were
+        not in the training data get -1.
+
+        Returns:
+            np.ndarray: int32 codes, or None if the bundle has no Provider encoding.
+        """
+        if not len(self.provider_ids):
+            return None
+        if self._provider_index is None:
+            self._provider_index = pd.Index(self.provider_ids)
+        return self._provider_index.get_indexer(pd.Index(providers)).astype(np.int32)
+
+    def shap_model(self):
+        """
+        The trees in the dictionary format shap.TreeExplainer accepts. Its
+        thresholds are in raw feature space, so raw features are explained
+        directly and give the same values as the model on scaled features.
+        """
+        ensemble = self.ensemble
+        trees = []
+        stops = list(ensemble.roots[1:]) + [len(ensemble.value)]
+        for root, stop in zip(ensemble.roots, stops):
+            is_leaf = np.isinf(ensemble.threshold[root:stop])
+            left = np.where(is_leaf, -1, ensemble.children[root:stop] - root)
+            trees.append({
+                'children_left': left,
+                'children_right': np.where(is_leaf, -1, left + 1),
+                'children_default': left,
+                'features': np.where(is_leaf, -2, ensemble.feature[root:stop]),
+                'thresholds': np.where(is_leaf, -2.0, ensemble.threshold[root:stop]),
+                'values': ensemble.value[root:stop, None],
+                'node_sample_weight': np.asarray(self.cover[root:stop], dtype=np.float64),
+            })
+        return {'trees': trees, 'base_offset': ensemble.init_raw, 'tree_output': 'log_odds',
+                'objective': 'binary_crossentropy', 'input_dtype': np.float64, 'internal_dtype': np.float64}
+
+
+def save_bundle(model, scaler, path=BUNDLE_PATH, provider_encoding=None, metadata=None):
+    """
+    Bundles a fitted model and scaler and writes them to path.
+
+    Returns:
+        str: The content hash of the new bundle.
+    """
+    content_hash = ModelBundle.from_model(model, scaler, provider_encoding, metadata).save(path)
+    logging.info(f"Model bundle saved to '{path}' (version {content_hash[:12]}).")
+    return content_hash
+
+
+if __name__ == '__main__':
+    import joblib
+
+    parser = argparse.ArgumentParser(description='Build or inspect a model bundle.')
+    parser.add_argument('--model', default='claims_fraud_detection.pkl', help='Trained model pickle.')
+    parser.add_argument('--scaler', default='scaler.pkl', help='Fitted scaler pickle.')
+    parser.add_argument('--provider-encoding', help='JSON file mapping Provider IDs to codes.')
+    parser.add_argument('--output', default=BUNDLE_PATH, help='Where to write the bundle.')
+    parser.add_argument('--inspect', metavar='BUNDLE', help='Verify a bundle and print its header instead.')
+    args = parser.parse_args()
+
+    if args.inspect:
+        bundle = ModelBundle.load(args.inspect, verify=True)
+        print(json.dumps({'version': bundle.version, 'content_hash': bundle.content_hash,
+                          'feature_names': bundle.feature_names, 'providers': len(bundle.provider_ids),
+                          'metadata': bundle.metadata}, indent=2))
+    else:
+        encoding = None
+        if args.provider_encoding:
+            with open(args.provider_encoding) as f:
+                encoding = json.load(f)
+        save_bundle(joblib.load(args.model), joblib.load(args.scaler), args.output, encoding,
+                    {'source': os.path.basename(args.model)})
@@ -1,74 +1,234 @@
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import LabelEncoder
-
-def preprocess_data():
-    """
-    This function loads the raw data, merges the different files,
-    and creates the final cleaned dataset.
-    """
-    # Load the datasets
-    train_df = pd.read_csv('Train-1542865627584.csv')
-    train_beneficiary_df = pd.read_csv('Train_Beneficiarydata-1542865627584.csv')
-    train_inpatient_df = pd.read_csv('Train_Inpatientdata-1542865627584.csv')
-    train_outpatient_df = pd.read_csv('Train_Outpatientdata-1542865627584.csv')
-
-    # Merge inpatient and outpatient data
-    train_io_df = pd.concat([train_inpatient_df, train_outpatient_df], axis=0)
-
-    # Merge with beneficiary data
-    train_full_df = pd.merge(train_io_df, train_beneficiary_df, on='BeneID', how='inner')
-
-    # Merge with the main training data
-    final_df = pd.merge(train_full_df, train_df, on='Provider', how='inner')
-
-    # Feature Engineering and Cleaning (as described in README)
-    # This is a simplified version of the cleaning process.
-    # A more thorough implementation would handle missing values and categorical encoding more robustly.
-
-    # Drop unnecessary columns
-    final_df = final_df.drop(['BeneID', 'ClaimID', 'ClaimStartDt', 'ClaimEndDt', 'AttendingPhysician',
-                               'OperatingPhysician', 'OtherPhysician', 'ClmDiagnosisCode_1', 'ClmDiagnosisCode_2',
-                               'ClmDiagnosisCode_3', 'ClmDiagnosisCode_4', 'ClmDiagnosisCode_5',
-                               'ClmDiagnosisCode_6', 'ClmDiagnosisCode_7', 'ClmDiagnosisCode_8',
-                               'ClmDiagnosisCode_9', 'ClmDiagnosisCode_10', 'ClmProcedureCode_1',
-                               'ClmProcedureCode_2', 'ClmProcedureCode_3', 'ClmProcedureCode_4',
-                               'ClmProcedureCode_5', 'ClmProcedureCode_6', 'DeductibleAmtPaid','DiagnosisGroupCode',
-                               'DOB', 'DOD', 'State', 'County', 'Race'], axis=1, errors='ignore')
-
-    # RenalDiseaseIndicator: covert Y to 1 and N to 0
-    final_df['RenalDiseaseIndicator'] = final_df['RenalDiseaseIndicator'].apply(lambda x: 1 if x == 'Y' else 0)
-
-    # Create TotalReimbursement
-    final_df['TotalReimbursement'] = final_df['InscClaimAmtReimbursed'] + final_df['IPAnnualReimbursementAmt'] + final_df['OPAnnualReimbursementAmt']
-
-    # One-hot encode chronic conditions
-    for col in ['ChronicCond_Alzheimer', 'ChronicCond_Heartfailure',
-                'ChronicCond_KidneyDisease', 'ChronicCond_Cancer',
-                'ChronicCond_ObstrPulmonary', 'ChronicCond_Depression',
-                'ChronicCond_Diabetes', 'ChronicCond_IschemicHeart',
-                'ChronicCond_Osteoporasis', 'ChronicCond_rheumatoidarthritis',
-                'ChronicCond_stroke']:
-        final_df[col] = final_df[col].apply(lambda x: 1 if x == 1 else 0)
-
-
-    final_df['PotentialFraud'] = final_df['PotentialFraud'].apply(lambda x: 1 if x == 'Yes' else 0)
-
-    # Convert all feature columns to numeric, coercing errors
-    for col in final_df.columns:
-        if col != 'PotentialFraud':
-            final_df[col] = pd.to_numeric(final_df[col], errors='coerce')
-
-    # Fill missing values with 0 (a simple imputation strategy)
-    final_df = final_df.fillna(0)
-
-    # Label encode the 'Provider' column
-    le = LabelEncoder()
-    final_df['Provider'] = le.fit_transform(final_df['Provider'])
-
-    # Save the cleaned data
-    final_df.to_csv('claims_cleaned_data.csv', index=False)
-    print("Pre-processing complete. Cleaned data saved to 'claims_cleaned_data.csv'")
-
-if __name__ == '__main__':
-    preprocess_data()
\ No newline at end of file
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+import instrumentation
+from feature_store import (ParquetAppender, parquet_path_for, provider_encoding_path_for, save_provider_encoding,
+                           write_cleaned_data)
+from instrumentation import stage, timed, timed_iter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Raw Kaggle files and the cleaned output
+TRAIN_PATH = 'Train-1542865627584.csv'
+BENEFICIARY_PATH = 'Train_Beneficiarydata-1542865627584.csv'
+INPATIENT_PATH = 'Train_Inpatientdata-1542865627584.csv'
+OUTPATIENT_PATH = 'Train_Outpatientdata-1542865627584.csv'
+OUTPUT_PATH = 'claims_cleaned_data.csv'
+
+# Columns that are not used by the model
+DROP_COLUMNS = ['BeneID', 'ClaimID', 'ClaimStartDt', 'ClaimEndDt', 'AttendingPhysician',
+                'OperatingPhysician', 'OtherPhysician', 'ClmDiagnosisCode_1', 'ClmDiagnosisCode_2',
+                'ClmDiagnosisCode_3', 'ClmDiagnosisCode_4', 'ClmDiagnosisCode_5',
+                'ClmDiagnosisCode_6', 'ClmDiagnosisCode_7', 'ClmDiagnosisCode_8',
+                'ClmDiagnosisCode_9', 'ClmDiagnosisCode_10', 'ClmProcedureCode_1',
+                'ClmProcedureCode_2', 'ClmProcedureCode_3', 'ClmProcedureCode_4',
+                'ClmProcedureCode_5', 'ClmProcedureCode_6', 'DeductibleAmtPaid', 'DiagnosisGroupCode',
+                'DOB', 'DOD', 'State', 'County', 'Race']
+
+CHRONIC_COLUMNS = ['ChronicCond_Alzheimer', 'ChronicCond_Heartfailure',
+                   'ChronicCond_KidneyDisease', 'ChronicCond_Cancer',
+                   'ChronicCond_ObstrPulmonary', 'ChronicCond_Depression',
+                   'ChronicCond_Diabetes', 'ChronicCond_IschemicHeart',
+                   'ChronicCond_Osteoporasis', 'ChronicCond_rheumatoidarthritis',
+                   'ChronicCond_stroke']
+
+
+@timed('claims.beneficiary_lookup')
+def build_beneficiary_lookup(beneficiary_df):
+    """
+    Encodes the beneficiary table once so that claims can be joined against it.
+
+    RenalDiseaseIndicator is mapped Y -> 1 and everything else -> 0, and the
+    chronic condition columns are mapped 1 -> 1 and everything else -> 0.
+    """
+    beneficiary_df = beneficiary_df.drop([col for col in DROP_COLUMNS if col != 'BeneID'], axis=1, errors='ignore')
+    beneficiary_df['RenalDiseaseIndicator'] = (beneficiary_df['RenalDiseaseIndicator'] == 'Y').astype('int64')
+    for col in CHRONIC_COLUMNS:
+        beneficiary_df[col] = (beneficiary_df[col] == 1).astype('int64')
+    return beneficiary_df
+
+
+def build_provider_lookup(train_df):
+    """
+    Encodes the provider labels once: PotentialFraud Yes -> 1, everything else -> 0.
+    """
+    train_df = train_df.copy()
+    train_df['PotentialFraud'] = (train_df['PotentialFraud'] == 'Yes').astype('int64')
+    return train_df
+
+
+@timed('claims.join')
+def join_claims(claims_df, beneficiary_lookup, provider_lookup=None):
+    """
+    Joins claims against the encoded beneficiary table and, when given,
+    the provider labels. Claims without a match are dropped.
+    """
+    # Merge with beneficiary data
+    df = pd.merge(claims_df, beneficiary_lookup, on='BeneID', how='inner')
+
+    # Merge with the main training data
+    if provider_lookup is not None:
+        df = pd.merge(df, provider_lookup, on='Provider', how='inner')
+    return df
+
+
+@timed('claims.encode')
+def encode_claims(df):
+    """
+    Drops the unused columns of joined claims and converts the rest to numbers.
+
+    The 'Provider' column is left un-encoded; label encoding needs every
+    provider value and is done by the caller.
+    """
+    # Drop unnecessary columns
+    df = df.drop(DROP_COLUMNS, axis=1, errors='ignore')
+
+    # Create TotalReimbursement
+    df['TotalReimbursement'] = df['InscClaimAmtReimbursed'] + df['IPAnnualReimbursementAmt'] + df['OPAnnualReimbursementAmt']
+
+    # Convert all feature columns to numeric, coercing errors
+    for col in df.columns:
+        if col != 'PotentialFraud':
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Fill missing values with 0 (a simple imputation strategy)
+    return df.fillna(0)
+
+
+def clean_claims(claims_df, beneficiary_lookup, provider_lookup):
+    """
+    Joins claims against the encoded lookup tables and cleans the result.
+    """
+    return encode_claims(join_claims(claims_df, beneficiary_lookup, provider_lookup))
+
+
+@timed('preprocess')
+def preprocess_data(chunksize=None, output_path=OUTPUT_PATH):
+    """
+    This function loads the raw data, merges the different files,
+    and creates the final cleaned dataset.
+
+    Args:
+        chunksize (int, optional): Number of claim rows to process at a time.
+            When set, the inpatient and outpatient files are streamed so that
+            peak memory follows the chunk size instead of the dataset size.
+            The output is identical to the in-memory run.
+        output_path (str): Where to write the cleaned data.
+    """
+    if chunksize:
+        return _preprocess_data_chunked(chunksize, output_path)
+
+    # Load the datasets
+    with stage('preprocess.read') as read:
+        train_df = pd.read_csv(TRAIN_PATH)
+        train_beneficiary_df = pd.read_csv(BENEFICIARY_PATH)
+        train_inpatient_df = pd.read_csv(INPATIENT_PATH)
+        train_outpatient_df = pd.read_csv(OUTPATIENT_PATH)
+        read.rows = len(train_inpatient_df) + len(train_outpatient_df)
+
+    # Merge inpatient and outpatient data
+    with stage('preprocess.concat', rows=read.rows):
+        train_io_df = pd.concat([train_inpatient_df, train_outpatient_df], axis=0)
+
+    final_df = clean_claims(train_io_df,
+                            build_beneficiary_lookup(train_beneficiary_df),
+                            build_provider_lookup(train_df))
+
+    # Label encode the 'Provider' column
+    with stage('preprocess.label_encode', rows=len(final_df)):
+        le = LabelEncoder()
+        final_df['Provider'] = le.fit_transform(final_df['Provider'])
+        save_provider_encoding(le.classes_, provider_encoding_path_for(output_path))
+
+    # Save the cleaned data
+    with stage('preprocess.write', rows=len(final_df)):
+        final_df.to_csv(output_path, index=False)
+        write_cleaned_data(final_df, output_path)
+    logging.info(f"Pre-processing complete. Cleaned data saved to '{output_path}'")
+
+
+def _preprocess_data_chunked(chunksize, output_path):
+    """
+    Streaming version of preprocess_data().
+
+    Cleaned chunks are spooled to Parquet in a first pass. A column's final
+    dtype and the Provider encoding depend on every row, so the CSV is only
+    written in a second pass once both are known.
+    """
+    with stage('preprocess.read_lookups'):
+        beneficiary_df = pd.read_csv(BENEFICIARY_PATH)
+        train_df = pd.read_csv(TRAIN_PATH)
+    beneficiary_lookup = build_beneficiary_lookup(beneficiary_df)
+    provider_lookup = build_provider_lookup(train_df)
+
+    # Inpatient and outpatient files are concatenated with the union of their columns
+    columns = list(pd.read_csv(INPATIENT_PATH, nrows=0).columns)
+    columns += [col for col in pd.read_csv(OUTPATIENT_PATH, nrows=0).columns if col not in columns]
+
+    spool_dir = tempfile.mkdtemp(prefix='claims_chunks_')
+    try:
+        parts = []
+        output_columns = None
+        float_columns = set()
+        providers = []
+
+        for path in (INPATIENT_PATH, OUTPATIENT_PATH):
+            for chunk in timed_iter('preprocess.read', pd.read_csv(path, chunksize=chunksize)):
+                df = clean_claims(chunk.reindex(columns=columns), beneficiary_lookup, provider_lookup)
+                if output_columns is None:
+                    output_columns = list(df.columns)
+                if df.empty:
+                    continue
+                float_columns.update(col for col in df.columns if df[col].dtype.kind == 'f')
+                providers.append(pd.Series(df['Provider'].unique()))
+
+                part_path = os.path.join(spool_dir, f'part-{len(parts):05d}.parquet')
+                with stage('preprocess.spool', rows=len(df)):
+                    df.to_parquet(part_path, index=False)
+                parts.append(part_path)
+
+        # Label encode the 'Provider' column over every chunk
+        with stage('preprocess.label_encode'):
+            le = LabelEncoder()
+            if providers:
+                le.fit(pd.concat(providers, ignore_index=True))
+                save_provider_encoding(le.classes_, provider_encoding_path_for(output_path))
+
+        pd.DataFrame(columns=output_columns).to_csv(output_path, index=False)
+        appender = ParquetAppender(parquet_path_for(output_path))
+        try:
+            for part_path in parts:
+                with stage('preprocess.write') as write:
+                    df = pd.read_parquet(part_path)
+                    for col in float_columns:
+                        df[col] = df[col].astype('float64')
+                    df['Provider'] = le.transform(df['Provider'])
+                    df.to_csv(output_path, mode='a', header=False, index=False)
+                    appender.write(df)
+                    write.rows = len(df)
+        finally:
+            appender.close()
+        if not parts:
+            write_cleaned_data(pd.DataFrame(columns=output_columns), output_path)
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+    logging.info(f"Pre-processing complete. Cleaned data saved to '{output_path}'")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Clean and merge the raw claims data.')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the claim files in chunks of this many rows.')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='Path of the cleaned CSV.')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session(args):
+        preprocess_data(chunksize=args.chunksize, output_path=args.output)
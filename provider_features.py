@@ -0,0 +1,149 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocess_data import INPATIENT_PATH, OUTPATIENT_PATH
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROVIDER_FEATURES_PATH = 'provider_features.parquet'
+PHYSICIAN_COLUMNS = ['AttendingPhysician', 'OperatingPhysician', 'OtherPhysician']
+CLAIM_COLUMNS = ['Provider', 'BeneID', 'InscClaimAmtReimbursed'] + PHYSICIAN_COLUMNS
+STAY_COLUMNS = ['AdmissionDt', 'DischargeDt']
+PROVIDER_FEATURES = ['ProviderClaimCount', 'ProviderReimbursementSum', 'ProviderReimbursementMean',
+                     'ProviderReimbursementMedian', 'ProviderReimbursementP90', 'ProviderReimbursementMax',
+                     'ProviderDistinctBeneficiaries', 'ProviderDistinctPhysicians', 'ProviderMeanLengthOfStay',
+                     'ProviderMaxLengthOfStay', 'ProviderInpatientShare']
+
+
+def _distinct_per_group(group_codes, values, n_groups):
+    """Counts the distinct non-null values of each group with one sort of (group, value) pairs."""
+    mask = pd.notna(values)
+    value_codes, uniques = pd.factorize(values[mask])
+    width = max(len(uniques), 1)
+    pairs = np.unique(group_codes[mask].astype(np.int64) * width + value_codes)
+    return np.bincount(pairs // width, minlength=n_groups)
+
+
+def _group_quantile(sorted_values, starts, counts, q):
+    """Linear-interpolated quantile of each group in values sorted within groups."""
+    position = starts + q * (counts - 1)
+    lo = np.floor(position).astype(np.int64)
+    hi = np.ceil(position).astype(np.int64)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (position - lo)
+
+
+def compute_provider_features(inpatient_df, outpatient_df):
+    """
+    Aggregates raw inpatient and outpatient claims per provider.
+
+    Providers are factorized once, and the claims are sorted by (provider,
+    reimbursement). Each provider's claims then form one contiguous run,
+    so sums, maxima and quantiles are reductions over run boundaries
+    instead of a Python loop. Distinct counts sort (provider, value) pairs.
+    Length of stay is DischargeDt - AdmissionDt in days over the provider's
+    inpatient claims, and 0 for providers without any.
+
+    Returns:
+        pd.DataFrame: One row per provider with the PROVIDER_FEATURES.
+    """
+    claims = pd.concat([inpatient_df[CLAIM_COLUMNS], outpatient_df[CLAIM_COLUMNS]], ignore_index=True)
+    is_inpatient = np.r_[np.ones(len(inpatient_df)), np.zeros(len(outpatient_df))]
+    provider_codes, providers = pd.factorize(claims['Provider'], sort=True)
+    n_providers = len(providers)
+
+    amount = claims['InscClaimAmtReimbursed'].fillna(0).to_numpy(dtype=np.float64)
+    order = np.lexsort((amount, provider_codes))
+    sorted_amount = amount[order]
+    sorted_codes = provider_codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_codes)])
+    sums = np.add.reduceat(sorted_amount, starts)
+
+    stay = (pd.to_datetime(inpatient_df['DischargeDt']) - pd.to_datetime(inpatient_df['AdmissionDt'])).dt.days
+    stay = stay.fillna(0).to_numpy(dtype=np.float64)
+    stay_codes = provider_codes[:len(inpatient_df)]
+    stay_counts = np.bincount(stay_codes, minlength=n_providers)
+    stay_sums = np.bincount(stay_codes, weights=stay, minlength=n_providers)
+    stay_max = np.zeros(n_providers)
+    np.maximum.at(stay_max, stay_codes, stay)
+
+    physicians = claims[PHYSICIAN_COLUMNS].to_numpy().ravel()
+    physician_codes = np.repeat(provider_codes, len(PHYSICIAN_COLUMNS))
+
+    features = pd.DataFrame({
+        'Provider': np.asarray(providers),
+        'ProviderClaimCount': counts.astype(np.int32),
+        'ProviderReimbursementSum': sums,
+        'ProviderReimbursementMean': sums / counts,
+        'ProviderReimbursementMedian': _group_quantile(sorted_amount, starts, counts, 0.5),
+        'ProviderReimbursementP90': _group_quantile(sorted_amount, starts, counts, 0.9),
+        'ProviderReimbursementMax': sorted_amount[starts + counts - 1],
+        'ProviderDistinctBeneficiaries': _distinct_per_group(provider_codes, claims['BeneID'].to_numpy(),
+                                                             n_providers).astype(np.int32),
+        'ProviderDistinctPhysicians': _distinct_per_group(physician_codes, physicians, n_providers).astype(np.int32),
+        'ProviderMeanLengthOfStay': np.divide(stay_sums, stay_counts, out=np.zeros(n_providers),
+                                              where=stay_counts > 0),
+        'ProviderMaxLengthOfStay': stay_max,
+        'ProviderInpatientShare': np.bincount(provider_codes, weights=is_inpatient, minlength=n_providers) / counts,
+    })
+    float_columns = [col for col in PROVIDER_FEATURES if features[col].dtype == np.float64]
+    return features.astype({col: 'float32' for col in float_columns})
+
+
+class ProviderFeatureTable:
+    """
+    Provider aggregates indexed for joining onto claims.
+
+    The provider IDs are held in a hashed pd.Index next to a float32
+    matrix of their features, so looking up a claim's provider is a hash
+    probe and a row gather. Providers that are not in the table get zeros.
+    """
+
+    def __init__(self, features):
+        self.feature_names = [col for col in features.columns if col != 'Provider']
+        self.index = pd.Index(features['Provider'])
+        values = features[self.feature_names].to_numpy(dtype=np.float32)
+        self.values = np.vstack([values, np.zeros((1, len(self.feature_names)), dtype=np.float32)])
+
+    @classmethod
+    def load(cls, path=PROVIDER_FEATURES_PATH):
+        return cls(pd.read_parquet(path))
+
+    def lookup(self, providers):
+        """Returns the feature rows for an array of provider IDs."""
+        positions = self.index.get_indexer(providers)
+        positions[positions < 0] = len(self.index)
+        return self.values[positions]
+
+    def join(self, df, on='Provider'):
+        """Returns df with the provider features added as columns."""
+        joined = pd.DataFrame(self.lookup(df[on].to_numpy()), columns=self.feature_names, index=df.index)
+        return pd.concat([df, joined], axis=1)
+
+
+def build_provider_features(inpatient_path=INPATIENT_PATH, outpatient_path=OUTPATIENT_PATH,
+                            output_path=PROVIDER_FEATURES_PATH):
+    """Reads only the needed claim columns, computes the provider features and saves them to Parquet."""
+    start = time.perf_counter()
+    inpatient_df = pd.read_csv(inpatient_path, usecols=CLAIM_COLUMNS + STAY_COLUMNS)
+    outpatient_df = pd.read_csv(outpatient_path, usecols=CLAIM_COLUMNS)
+    features = compute_provider_features(inpatient_df, outpatient_df)
+    features.to_parquet(output_path, index=False)
+    logging.info(f"Saved features for {len(features)} providers from {len(inpatient_df) + len(outpatient_df)} "
+                 f"claims to '{output_path}' in {time.perf_counter() - start:.1f}s.")
+    return features
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute per-provider aggregate features.')
+    parser.add_argument('--inpatient', default=INPATIENT_PATH, help='Raw inpatient claims CSV.')
+    parser.add_argument('--outpatient', default=OUTPATIENT_PATH, help='Raw outpatient claims CSV.')
+    parser.add_argument('--output', default=PROVIDER_FEATURES_PATH, help='Where to save the provider table.')
+    args = parser.parse_args()
+
+    build_provider_features(args.inpatient, args.outpatient, args.output)
@@ -0,0 +1,173 @@
+import argparse
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import instrumentation
+from feature_store import ParquetAppender
+from instrumentation import stage, timed, timed_iter
+from model_bundle import BUNDLE_PATH, ModelBundle
+from preprocess_data import build_beneficiary_lookup, encode_claims, join_claims
+from provider_features import ProviderFeatureTable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BENEFICIARY_PATH = 'Test_Beneficiarydata-1542969243754.csv'
+OUTPUT_COLUMNS = ['ClaimID', 'Provider', 'FraudProbability']
+
+# Artifacts loaded once per process by _init_scorer()
+_scorer = {}
+
+
+def _init_scorer(bundle_path, beneficiary_lookup, provider_table=None):
+    """
+    Memory-maps the model bundle in the current (worker) process. Every
+    worker maps the same file, so the trees are held in memory only once.
+    """
+    with stage('score.load_artifacts'):
+        _scorer['bundle'] = ModelBundle.load(bundle_path)
+    _scorer['features'] = _scorer['bundle'].feature_names
+    _scorer['beneficiary_lookup'] = beneficiary_lookup
+    _scorer['provider_table'] = provider_table
+
+
+@timed('score.chunk')
+def score_chunk(chunk):
+    """
+    Scores one chunk of raw claims with the artifacts loaded by _init_scorer().
+
+    Claims are joined with the beneficiary table and cleaned the same way as
+    in preprocess_data(); claims without beneficiary data are dropped.
+    Providers are encoded with the bundle's Provider encoding when it has
+    one. When a provider feature table was loaded, its aggregates are joined on.
+
+    Returns:
+        pd.DataFrame: ClaimID, Provider and FraudProbability per scored claim,
+        followed by the provider features if any.
+    """
+    joined = join_claims(chunk, _scorer['beneficiary_lookup'])
+    bundle = _scorer['bundle']
+    features = encode_claims(joined)[_scorer['features']]
+    result = joined[['ClaimID', 'Provider']].copy()
+    if len(joined):
+        provider_codes = bundle.encode_providers(joined['Provider'])
+        if provider_codes is not None:
+            features = features.assign(Provider=provider_codes)
+        with stage('score.predict', rows=len(features)):
+            result['FraudProbability'] = bundle.predict_proba(features.to_numpy(dtype='float64'))[:, 1]
+    else:
+        result['FraudProbability'] = pd.Series(dtype='float64')
+    if _scorer['provider_table'] is not None:
+        with stage('score.provider_join', rows=len(result)):
+            result = _scorer['provider_table'].join(result)
+    return result
+
+
+class _ResultWriter:
+    """Appends scored chunks to a CSV or Parquet file, chosen by extension."""
+
+    def __init__(self, path, columns=OUTPUT_COLUMNS):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        if path.endswith('.parquet'):
+            self._parquet = ParquetAppender(path, compact=False)
+        else:
+            self._parquet = None
+            pd.DataFrame(columns=columns).to_csv(path, index=False)
+
+    def write(self, df):
+        self.rows += len(df)
+        with stage('score.write', rows=len(df)):
+            if self._parquet is not None:
+                if len(df):
+                    self._parquet.write(df)
+            else:
+                df.to_csv(self.path, mode='a', header=False, index=False)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            if self._parquet.schema is None:
+                pd.DataFrame(columns=self.columns).to_parquet(self.path, index=False)
+
+
+@timed('score')
+def score_claims(claims_path, output_path, beneficiary_path=BENEFICIARY_PATH, chunksize=100000,
+                 workers=0, bundle_path=BUNDLE_PATH, provider_features_path=None):
+    """
+    Scores a whole claims file in chunks.
+
+    Args:
+        claims_path (str): Raw inpatient or outpatient claims CSV.
+        output_path (str): Where to write the scores (.csv or .parquet).
+        beneficiary_path (str): Raw beneficiary CSV for the claims.
+        chunksize (int): Number of claims read and scored at a time.
+        workers (int): Number of worker processes. 0 scores in this process.
+        bundle_path (str): The model bundle.
+        provider_features_path (str, optional): Provider feature table from
+            provider_features.py whose aggregates are added to the output.
+
+    Returns:
+        dict: Rows read, rows scored, elapsed seconds and claims per second.
+    """
+    logging.info(f"Scoring claims from {claims_path}...")
+    start = time.perf_counter()
+    beneficiary_lookup = build_beneficiary_lookup(pd.read_csv(beneficiary_path))
+    provider_table = ProviderFeatureTable.load(provider_features_path) if provider_features_path else None
+    columns = OUTPUT_COLUMNS + (provider_table.feature_names if provider_table is not None else [])
+    reader = timed_iter('score.read', pd.read_csv(claims_path, chunksize=chunksize))
+    writer = _ResultWriter(output_path, columns)
+    rows_read = 0
+
+    try:
+        if workers:
+            # Keep a bounded number of chunks in flight so memory stays flat
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_scorer,
+                                     initargs=(bundle_path, beneficiary_lookup, provider_table)) as executor:
+                pending = deque()
+                for chunk in reader:
+                    rows_read += len(chunk)
+                    pending.append(executor.submit(score_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        writer.write(pending.popleft().result())
+                while pending:
+                    writer.write(pending.popleft().result())
+        else:
+            _init_scorer(bundle_path, beneficiary_lookup, provider_table)
+            for chunk in reader:
+                rows_read += len(chunk)
+                writer.write(score_chunk(chunk))
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'rows_read': rows_read,
+        'rows_scored': writer.rows,
+        'seconds': elapsed,
+        'claims_per_second': writer.rows / elapsed if elapsed else 0.0,
+    }
+    logging.info(f"Scored {writer.rows} of {rows_read} claims in {elapsed:.2f}s "
+                 f"({stats['claims_per_second']:.0f} claims/s). Results saved to {output_path}")
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a file of raw claims for fraud.')
+    parser.add_argument('claims', help='Raw claims CSV, e.g. Test_Inpatientdata-1542969243754.csv')
+    parser.add_argument('output', help='Output file (.csv or .parquet)')
+    parser.add_argument('--beneficiary', default=BENEFICIARY_PATH, help='Raw beneficiary CSV.')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Claims per chunk.')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 = score in-process).')
+    parser.add_argument('--bundle', default=BUNDLE_PATH, help='Model bundle.')
+    parser.add_argument('--provider-features', help='Provider feature table to add to the output.')
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session(args):
+        score_claims(args.claims, args.output, beneficiary_path=args.beneficiary, chunksize=args.chunksize,
+                     workers=args.workers, bundle_path=args.bundle, provider_features_path=args.provider_features)
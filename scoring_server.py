@@ -0,0 +1,225 @@
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import instrumentation
+from instrumentation import stage
+from model_bundle import BUNDLE_PATH, ModelBundle
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring calls into batches.
+
+    A background thread waits for the first pending request, then keeps
+    collecting requests until either max_batch_size rows are queued or
+    max_latency_ms has passed since the first one arrived. The whole batch
+    is scored with a single call to score_fn.
+
+    Args:
+        score_fn (callable): Maps a 2-D feature array to a 1-D array of probabilities.
+        max_batch_size (int): Maximum number of rows scored together.
+        max_latency_ms (float): How long the first request of a batch may wait for others.
+    """
+
+    def __init__(self, score_fn, max_batch_size=64, max_latency_ms=5.0):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queues a 2-D array of rows and returns a Future of their probabilities."""
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def score(self, rows):
+        """Scores rows through the batcher, blocking until the result is ready."""
+        return self.submit(rows).result()
+
+    def close(self):
+        self._queue.put((None, None))
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            rows, future = self._queue.get()
+            if future is None:
+                return
+            batch = [(rows, future)]
+            size = len(rows)
+            deadline = time.monotonic() + self.max_latency
+            stop = False
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    rows, future = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if future is None:
+                    stop = True
+                    break
+                batch.append((rows, future))
+                size += len(rows)
+
+            self._score_batch(batch)
+            if stop:
+                return
+
+    def _score_batch(self, batch):
+        self.batches += 1
+        try:
+            proba = self.score_fn(np.vstack([rows for rows, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        offset = 0
+        for rows, future in batch:
+            future.set_result(proba[offset:offset + len(rows)])
+            offset += len(rows)
+
+
+class ClaimScorer:
+    """Wraps the model bundle for scoring arrays of claim features."""
+
+    def __init__(self, bundle_path=BUNDLE_PATH):
+        self.bundle = ModelBundle.load(bundle_path)
+        self.features = self.bundle.feature_names
+
+    def to_rows(self, claims):
+        """
+        Converts claim dicts to a feature array in the model's column order.
+
+        Raises:
+            ValueError: If a claim is missing a feature or has a non-numeric value.
+        """
+        rows = np.empty((len(claims), len(self.features)))
+        for i, claim in enumerate(claims):
+            missing = [f for f in self.features if f not in claim]
+            if missing:
+                raise ValueError(f"Claim {i} is missing: {', '.join(missing)}")
+            try:
+                rows[i] = [float(claim[f]) for f in self.features]
+            except (TypeError, ValueError):
+                raise ValueError(f"Claim {i} has a non-numeric feature value")
+        return rows
+
+    def predict_proba(self, rows):
+        with stage('serve.predict', rows=len(rows)):
+            # The bundle's thresholds are in raw feature space, so rows are not scaled first
+            return self.bundle.predict_proba(rows)[:, 1]
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for many concurrent clients."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """
+    POST /score accepts one claim as a JSON object, or a JSON-lines body with
+    one claim per line. Each claim holds the model features; an optional
+    ClaimID is echoed back. GET /health reports the batcher state and
+    GET /metrics the per-stage timings in Prometheus text format.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            return self._send(200, instrumentation.to_prometheus(), 'text/plain; version=0.0.4')
+        if self.path != '/health':
+            return self._send_json(404, {'error': 'Not found'})
+        self._send_json(200, {'status': 'ok', 'batches': self.server.batcher.batches,
+                              'model_version': self.server.scorer.bundle.version})
+
+    def do_POST(self):
+        if self.path != '/score':
+            return self._send_json(404, {'error': 'Not found'})
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        try:
+            lines = [line for line in body.splitlines() if line.strip()]
+            json_lines = 'jsonl' in self.headers.get('Content-Type', '') or 'ndjson' in self.headers.get('Content-Type', '')
+            claims = [json.loads(line) for line in lines] if json_lines else [json.loads(body)]
+            if not all(isinstance(claim, dict) for claim in claims):
+                raise ValueError("Each claim must be a JSON object")
+            rows = self.server.scorer.to_rows(claims)
+        except ValueError as e:
+            return self._send_json(400, {'error': str(e)})
+
+        try:
+            proba = self.server.batcher.score(rows) if len(rows) else []
+        except Exception as e:
+            logging.error(f"Scoring failed: {e}")
+            return self._send_json(500, {'error': 'Scoring failed'})
+        results = [{'ClaimID': claim.get('ClaimID'), 'FraudProbability': float(p)}
+                   for claim, p in zip(claims, proba)]
+        if json_lines:
+            self._send(200, ''.join(json.dumps(r) + '\n' for r in results), 'application/jsonl')
+        else:
+            self._send_json(200, results[0])
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload), 'application/json')
+
+    def _send(self, status, text, content_type):
+        data = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8000, max_batch_size=64, max_latency_ms=5.0,
+                bundle_path=BUNDLE_PATH):
+    """Builds the scoring server; call serve_forever() on the result to run it."""
+    server = ScoringServer((host, port), ScoringHandler)
+    server.scorer = ClaimScorer(bundle_path)
+    server.batcher = MicroBatcher(server.scorer.predict_proba, max_batch_size, max_latency_ms)
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve fraud scores over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=64, help='Most claims scored in one batch.')
+    parser.add_argument('--max-latency-ms', type=float, default=5.0,
+                        help='How long a request may wait for others to join its batch.')
+    parser.add_argument('--bundle', default=BUNDLE_PATH, help='Model bundle.')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.max_batch_size, args.max_latency_ms, args.bundle)
+    logging.info(f"Scoring server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
@@ -0,0 +1,180 @@
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from preprocess_data import CHRONIC_COLUMNS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# File names and column order of the Kaggle healthcare provider fraud dataset
+TRAIN_FILES = {
+    'labels': 'Train-1542865627584.csv',
+    'beneficiary': 'Train_Beneficiarydata-1542865627584.csv',
+    'inpatient': 'Train_Inpatientdata-1542865627584.csv',
+    'outpatient': 'Train_Outpatientdata-1542865627584.csv',
+}
+TEST_FILES = {
+    'labels': 'Test-1542969243754.csv',
+    'beneficiary': 'Test_Beneficiarydata-1542969243754.csv',
+    'inpatient': 'Test_Inpatientdata-1542969243754.csv',
+    'outpatient': 'Test_Outpatientdata-1542969243754.csv',
+}
+BENEFICIARY_COLUMNS = (['BeneID', 'DOB', 'DOD', 'Gender', 'Race', 'RenalDiseaseIndicator', 'State', 'County',
+                        'NoOfMonths_PartACov', 'NoOfMonths_PartBCov'] + CHRONIC_COLUMNS +
+                       ['IPAnnualReimbursementAmt', 'IPAnnualDeductibleAmt', 'OPAnnualReimbursementAmt',
+                        'OPAnnualDeductibleAmt'])
+DIAGNOSIS_COLUMNS = [f'ClmDiagnosisCode_{i}' for i in range(1, 11)]
+PROCEDURE_COLUMNS = [f'ClmProcedureCode_{i}' for i in range(1, 7)]
+INPATIENT_COLUMNS = (['BeneID', 'ClaimID', 'ClaimStartDt', 'ClaimEndDt', 'Provider', 'InscClaimAmtReimbursed',
+                      'AttendingPhysician', 'OperatingPhysician', 'OtherPhysician', 'AdmissionDt',
+                      'ClmAdmitDiagnosisCode', 'DeductibleAmtPaid', 'DischargeDt', 'DiagnosisGroupCode'] +
+                     DIAGNOSIS_COLUMNS + PROCEDURE_COLUMNS)
+OUTPATIENT_COLUMNS = (['BeneID', 'ClaimID', 'ClaimStartDt', 'ClaimEndDt', 'Provider', 'InscClaimAmtReimbursed',
+                       'AttendingPhysician', 'OperatingPhysician', 'OtherPhysician'] +
+                      DIAGNOSIS_COLUMNS + PROCEDURE_COLUMNS + ['DeductibleAmtPaid', 'ClmAdmitDiagnosisCode'])
+
+# Proportions of the Kaggle training data: ~558k claims, 7% inpatient, ~4 claims per
+# beneficiary, ~100 per provider and ~6 per attending physician; 9.4% of providers are fraudulent
+INPATIENT_SHARE = 0.07
+CLAIMS_PER_BENEFICIARY = 4
+CLAIMS_PER_PROVIDER = 100
+CLAIMS_PER_PHYSICIAN = 6
+FRAUD_RATE = 0.094
+
+
+def _ids(prefix, start, n):
+    return np.char.add(prefix, np.arange(start, start + n).astype(str))
+
+
+def _codes(rng, n, missing, low=1000, high=99999):
+    """Random ICD-9-style code strings, some of them V codes, with a share of missing values."""
+    codes = rng.integers(low, high, n).astype(str).astype(object)
+    v_codes = rng.random(n) < 0.05
+    codes[v_codes] = np.char.add('V', rng.integers(100, 900, v_codes.sum()).astype(str))
+    codes[rng.random(n) < missing] = None
+    return codes
+
+
+def _beneficiaries(rng, n):
+    dob = np.datetime64('1920-01-01') + rng.integers(0, 365 * 50, n).astype('timedelta64[D]')
+    df = pd.DataFrame({
+        'BeneID': _ids('BENE', 11001, n),
+        'DOB': dob.astype(str),
+        'DOD': np.where(rng.random(n) < 0.01, '2009-12-01', None),
+        'Gender': rng.integers(1, 3, n),
+        'Race': rng.choice([1, 2, 3, 5], n, p=[0.85, 0.1, 0.03, 0.02]),
+        'RenalDiseaseIndicator': np.where(rng.random(n) < 0.15, 'Y', '0'),
+        'State': rng.integers(1, 55, n),
+        'County': rng.integers(0, 1000, n),
+        'NoOfMonths_PartACov': np.where(rng.random(n) < 0.98, 12, rng.integers(0, 12, n)),
+        'NoOfMonths_PartBCov': np.where(rng.random(n) < 0.98, 12, rng.integers(0, 12, n)),
+    })
+    for col in CHRONIC_COLUMNS:
+        df[col] = np.where(rng.random(n) < rng.uniform(0.1, 0.6), 1, 2)
+    df['IPAnnualReimbursementAmt'] = np.where(rng.random(n) < 0.7, 0, rng.gamma(1.2, 8000, n).round(-1)).astype(int)
+    df['IPAnnualDeductibleAmt'] = np.where(df['IPAnnualReimbursementAmt'] > 0, 1068, 0)
+    df['OPAnnualReimbursementAmt'] = rng.gamma(1.0, 1300, n).round(-1).astype(int)
+    df['OPAnnualDeductibleAmt'] = rng.gamma(1.0, 380, n).round(-1).astype(int)
+    return df[BENEFICIARY_COLUMNS]
+
+
+def _claims(rng, n, start_id, inpatient, beneficiary_ids, provider_ids, fraud, n_physicians):
+    """One chunk of inpatient or outpatient claims. Fraudulent providers bill more and keep patients longer."""
+    provider = rng.integers(0, len(provider_ids), n)
+    is_fraud = fraud[provider]
+    if inpatient:
+        amount = rng.gamma(1.6, 6000, n) * np.where(is_fraud, 1.4, 1.0)
+        stay = rng.integers(0, 12, n) + np.where(is_fraud, rng.integers(0, 6, n), 0)
+    else:
+        amount = rng.gamma(0.8, 350, n) * np.where(is_fraud, 1.3, 1.0)
+        stay = rng.integers(0, 2, n)
+    claim_start = np.datetime64('2008-11-27') + rng.integers(0, 400, n).astype('timedelta64[D]')
+    claim_end = claim_start + stay.astype('timedelta64[D]')
+
+    df = pd.DataFrame({
+        'BeneID': beneficiary_ids[rng.integers(0, len(beneficiary_ids), n)],
+        'ClaimID': _ids('CLM', start_id, n),
+        'ClaimStartDt': claim_start.astype(str),
+        'ClaimEndDt': claim_end.astype(str),
+        'Provider': provider_ids[provider],
+        'InscClaimAmtReimbursed': np.round(amount, -1 if inpatient else 0).astype(int),
+        'AttendingPhysician': _ids('PHY', 310000, n_physicians)[rng.integers(0, n_physicians, n)],
+        'OperatingPhysician': np.where(rng.random(n) < (0.6 if inpatient else 0.17),
+                                       _ids('PHY', 310000, n_physicians)[rng.integers(0, n_physicians, n)], None),
+        'OtherPhysician': np.where(rng.random(n) < (0.1 if inpatient else 0.35),
+                                   _ids('PHY', 310000, n_physicians)[rng.integers(0, n_physicians, n)], None),
+        'ClmAdmitDiagnosisCode': _codes(rng, n, 0.0 if inpatient else 0.75),
+        'DeductibleAmtPaid': np.where(rng.random(n) < 0.98, 1068.0 if inpatient else 0.0, np.nan),
+    })
+    if inpatient:
+        df['AdmissionDt'] = df['ClaimStartDt']
+        df['DischargeDt'] = df['ClaimEndDt']
+        df['DiagnosisGroupCode'] = np.where(rng.random(n) < 0.01, 'OTH', rng.integers(0, 1000, n).astype(str))
+    for i, col in enumerate(DIAGNOSIS_COLUMNS):
+        df[col] = _codes(rng, n, min(0.05 + 0.1 * i, 0.98) if inpatient else min(0.02 + 0.1 * i, 0.99))
+    for i, col in enumerate(PROCEDURE_COLUMNS):
+        df[col] = np.where(rng.random(n) < (0.45 + 0.1 * i if inpatient else 0.999), np.nan,
+                           rng.integers(1000, 9999, n).astype(float))
+    return df[INPATIENT_COLUMNS if inpatient else OUTPATIENT_COLUMNS]
+
+
+def _write_claims(path, n, inpatient, start_id, rng, beneficiary_ids, provider_ids, fraud, n_physicians, chunk_size):
+    for offset in range(0, max(n, 1), chunk_size):
+        rows = min(chunk_size, n - offset)
+        chunk = _claims(rng, rows, start_id + offset, inpatient, beneficiary_ids, provider_ids, fraud, n_physicians)
+        chunk.to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+
+
+def generate_claims(output_dir='.', n_claims=10000, seed=0, test_fraction=0.25, chunk_size=250000):
+    """
+    Writes a synthetic copy of the Kaggle dataset: the four Train files
+    with n_claims claims in total and the four Test files with
+    test_fraction as many claims. The schemas match the Kaggle files and
+    the row proportions follow the real data. Claims are written in chunks,
+    so 10M rows can be generated in bounded memory.
+
+    Returns:
+        dict: The number of claims, beneficiaries and providers per split.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    summary = {}
+    start_id = 100000
+    for split, files, size in (('train', TRAIN_FILES, n_claims), ('test', TEST_FILES, int(n_claims * test_fraction))):
+        n_inpatient = int(round(size * INPATIENT_SHARE))
+        n_outpatient = size - n_inpatient
+        n_beneficiaries = max(size // CLAIMS_PER_BENEFICIARY, 10)
+        n_providers = max(size // CLAIMS_PER_PROVIDER, 10)
+        n_physicians = max(size // CLAIMS_PER_PHYSICIAN, 10)
+
+        beneficiaries = _beneficiaries(rng, n_beneficiaries)
+        beneficiaries.to_csv(os.path.join(output_dir, files['beneficiary']), index=False)
+        provider_ids = _ids('PRV', 51001 if split == 'train' else 71001, n_providers)
+        fraud = rng.random(n_providers) < FRAUD_RATE
+        labels = pd.DataFrame({'Provider': provider_ids})
+        if split == 'train':
+            labels['PotentialFraud'] = np.where(fraud, 'Yes', 'No')
+        labels.to_csv(os.path.join(output_dir, files['labels']), index=False)
+
+        args = (rng, beneficiaries['BeneID'].to_numpy(), provider_ids, fraud, n_physicians, chunk_size)
+        _write_claims(os.path.join(output_dir, files['inpatient']), n_inpatient, True, start_id, *args)
+        _write_claims(os.path.join(output_dir, files['outpatient']), n_outpatient, False,
+                      start_id + n_inpatient, *args)
+        start_id += size
+        summary[split] = {'claims': size, 'beneficiaries': n_beneficiaries, 'providers': n_providers}
+        logging.info(f"Wrote {size} synthetic {split} claims to '{output_dir}'.")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic claims with the Kaggle file schemas.')
+    parser.add_argument('--rows', type=int, default=10000, help='Training claims (inpatient + outpatient).')
+    parser.add_argument('--output-dir', default='.', help='Where to write the CSV files.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generate_claims(args.output_dir, args.rows, args.seed)
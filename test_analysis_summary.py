@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy.stats import gaussian_kde
+
+from analysis_summary import CORRELATION_FEATURES, frame_from_dict, histogram_kde, load_summary
+from train_model import TOP_FEATURES
+
+
+class TestAnalysisSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        n = 500
+        df = pd.DataFrame({col: rng.integers(0, 2, n) for col in TOP_FEATURES})
+        df['PotentialFraud'] = rng.integers(0, 2, n)
+        for col in ['InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt', 'IPAnnualDeductibleAmt', 'TotalReimbursement']:
+            df[col] = rng.gamma(2.0, 1000.0, n).round()
+        self.df = df
+        self.data_path = os.path.join(self.tmpdir, 'claims_cleaned_data.csv')
+        self.summary_path = os.path.join(self.tmpdir, 'analysis_summary.json')
+        df.to_csv(self.data_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_kde_matches_scipy(self):
+        """Test that the binned KDE is close to an exact KDE over every row."""
+        values = self.df['TotalReimbursement'].to_numpy(dtype=float)
+        hist = histogram_kde(values)
+        exact = gaussian_kde(values)(hist['grid'])
+        np.testing.assert_allclose(hist['density'], exact, atol=exact.max() * 1e-3)
+        self.assertEqual(sum(hist['counts']), len(values))
+
+    def test_summary_matches_dataframe(self):
+        """Test that the stored statistics equal the ones computed from the data."""
+        summary = load_summary(self.data_path, self.summary_path)
+        self.assertEqual(summary['rows'], len(self.df))
+        pd.testing.assert_frame_equal(frame_from_dict(summary['describe']), self.df.describe(), check_dtype=False)
+        pd.testing.assert_frame_equal(frame_from_dict(summary['correlation']),
+                                      self.df[CORRELATION_FEATURES].corr(), check_dtype=False)
+
+    def test_rebuilt_only_for_new_dataset_version(self):
+        """Test that the saved summary is reused until the cleaned data changes."""
+        first = load_summary(self.data_path, self.summary_path)
+        mtime = os.path.getmtime(self.summary_path)
+        self.assertEqual(load_summary(self.data_path, self.summary_path), first)
+        self.assertEqual(os.path.getmtime(self.summary_path), mtime)
+
+        time.sleep(0.01)
+        self.df.head(100).to_csv(self.data_path, index=False)
+        self.assertEqual(load_summary(self.data_path, self.summary_path)['rows'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
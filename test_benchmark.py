@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from benchmark import find_regressions, load_history, run_benchmark
+from synthetic_claims import DIAGNOSIS_COLUMNS, PROCEDURE_COLUMNS, TEST_FILES, TRAIN_FILES, generate_claims
+
+REAL_TEST_INPATIENT = TEST_FILES['inpatient']
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_synthetic_schema_matches_kaggle(self):
+        """Test that the generated files have the Kaggle columns and dtypes."""
+        with tempfile.TemporaryDirectory() as tmp:
+            summary = generate_claims(tmp, n_claims=2000, seed=1)
+            self.assertEqual(summary['train']['claims'], 2000)
+            train = pd.read_csv(os.path.join(tmp, TRAIN_FILES['inpatient']))
+            labels = pd.read_csv(os.path.join(tmp, TRAIN_FILES['labels']))
+            self.assertTrue(train['Provider'].isin(labels['Provider']).all())
+            self.assertEqual(set(labels['PotentialFraud']), {'Yes', 'No'})
+
+            if not os.path.exists(REAL_TEST_INPATIENT):
+                self.skipTest(f"'{REAL_TEST_INPATIENT}' not available")
+            real = pd.read_csv(REAL_TEST_INPATIENT, nrows=1000)
+            generated = pd.read_csv(os.path.join(tmp, TEST_FILES['inpatient']))
+            self.assertEqual(list(generated.columns), list(real.columns))
+            # Sparse code columns may be all-numeric in a small sample, so only the other dtypes are compared
+            for col in real.columns.drop(DIAGNOSIS_COLUMNS + PROCEDURE_COLUMNS):
+                self.assertEqual(generated[col].dtype.kind, real[col].dtype.kind, col)
+
+    def test_find_regressions(self):
+        """Test that a run is compared with the median of earlier runs of the same size and backend."""
+        def record(rows, seconds, peak):
+            return {'rows': rows, 'backend': 'gb', 'stages': {'train': {'seconds': seconds, 'peak_rss_mb': peak}}}
+
+        history = [record(10000, 1.0, 100), record(10000, 1.1, 100), record(10000, 5.0, 100),
+                   record(20000, 0.1, 10)]
+        self.assertEqual(find_regressions(record(10000, 1.15, 110), history), [])
+        regressions = find_regressions(record(10000, 1.5, 150), history, threshold=0.2)
+        self.assertEqual({(r['stage'], r['metric']) for r in regressions},
+                         {('train', 'seconds'), ('train', 'peak_rss_mb')})
+        self.assertAlmostEqual(regressions[0]['baseline'], 1.1)
+        self.assertEqual(find_regressions(record(30000, 9.0, 900), history), [])
+
+    def test_run_benchmark_end_to_end(self):
+        """Test a small benchmark run over every stage and its history record."""
+        with tempfile.TemporaryDirectory() as tmp:
+            history_path = os.path.join(tmp, 'history.json')
+            run = run_benchmark(rows=3000, history_path=history_path, workdir=os.path.join(tmp, 'work'))
+            self.assertEqual(list(run['stages']), ['preprocess', 'train', 'predict_single', 'predict_batch',
+                                                   'explain_single', 'explain_batch'])
+            for result in run['stages'].values():
+                self.assertGreater(result['seconds'], 0)
+                self.assertGreater(result['peak_rss_mb'], 0)
+            self.assertEqual(load_history(history_path), [run])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from claim_sketches import ClaimSketches, GroupedHyperLogLog, GroupedTopK
+
+
+class TestClaimSketches(unittest.TestCase):
+
+    def test_hyperloglog_accuracy_and_merge(self):
+        """Test distinct counts per group and that merging halves equals sketching everything."""
+        keys = np.array(['PRV1'] * 20000 + ['PRV2'] * 30, dtype=object)
+        values = np.array([f'DX{i % 5000}' for i in range(20000)] + [f'DX{i}' for i in range(30)], dtype=object)
+        whole = GroupedHyperLogLog(p=10)
+        whole.add(keys, values)
+        counts = whole.count()
+        self.assertLess(abs(counts['PRV1'] / 5000 - 1), 0.1)
+        self.assertEqual(round(counts['PRV2']), 30)
+
+        first, second = GroupedHyperLogLog(p=10), GroupedHyperLogLog(p=10)
+        first.add(keys[::2], values[::2])
+        second.add(keys[1::2], values[1::2])
+        pd.testing.assert_series_equal(first.merge(second).count().sort_index(), counts.sort_index())
+
+    def test_top_k_merge(self):
+        """Test that the heaviest codes are found per group, also after merging chunks."""
+        rng = np.random.default_rng(0)
+        values = rng.zipf(1.5, 20000).astype(str)
+        keys = rng.choice(['PRV1', 'PRV2'], 20000)
+        expected = pd.DataFrame({'key': keys, 'value': values}).value_counts()
+
+        merged = GroupedTopK(k=3, width=1 << 12)
+        for start in range(0, 20000, 5000):
+            part = GroupedTopK(k=3, width=1 << 12)
+            part.add(keys[start:start + 5000], values[start:start + 5000])
+            merged.merge(part)
+        top = merged.top()
+        for key in ('PRV1', 'PRV2'):
+            self.assertEqual(top[top['key'] == key]['value'].tolist(), expected[key].index[:3].tolist())
+        # Count-min never underestimates
+        self.assertTrue((top.set_index(['key', 'value'])['count'] >= expected.reindex(
+            pd.MultiIndex.from_frame(top[['key', 'value']]))).all())
+
+    def test_claim_sketches_features(self):
+        """Test provider and physician features from chunked, merged claim sketches."""
+        claims = pd.DataFrame({
+            'Provider': ['PRV1', 'PRV1', 'PRV2', 'PRV1'],
+            'AttendingPhysician': ['PHY1', 'PHY2', 'PHY1', 'PHY1'],
+            'OperatingPhysician': [None, 'PHY3', None, None],
+            'ClmDiagnosisCode_1': ['4019', '4019', '2724', '25000'],
+            'ClmDiagnosisCode_2': ['2724', None, None, '4019'],
+            'ClmProcedureCode_1': ['9904', None, None, None],
+        })
+        sketches = ClaimSketches(width=1 << 10).update(claims.iloc[:2]).merge(
+            ClaimSketches(width=1 << 10).update(claims.iloc[2:]))
+
+        providers = sketches.provider_features().set_index('Provider')
+        self.assertEqual(providers.loc['PRV1', 'ProviderClaimCount'], 3)
+        self.assertEqual(providers.loc['PRV1', 'ProviderDistinctPhysicians'], 3)
+        self.assertEqual(providers.loc['PRV1', 'ProviderDistinctDiagnoses'], 3)
+        self.assertEqual(providers.loc['PRV1', 'ProviderDistinctProcedures'], 1)
+        self.assertEqual(providers.loc['PRV1', 'ProviderTopDiagnosisShare'], 1.0)
+        self.assertEqual(providers.loc['PRV2', 'ProviderTopProcedureShare'], 0)
+
+        physicians = sketches.physician_features().set_index('Physician')
+        self.assertEqual(physicians.loc['PHY1', 'PhysicianClaimCount'], 3)
+        self.assertEqual(physicians.loc['PHY1', 'PhysicianDistinctProviders'], 2)
+        self.assertAlmostEqual(physicians.loc['PHY1', 'PhysicianTopDiagnosisShare'], 2 / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import shap
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.preprocessing import StandardScaler
+
+from explain_claims import ClaimExplainer, explain_claims, load_explanations
+from model_bundle import ModelBundle
+from train_model import TOP_FEATURES
+
+
+class TestExplainClaims(unittest.TestCase):
+
+    def setUp(self):
+        """Fit a small model behind a scaler on random claims."""
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.integers(0, 2, (300, len(TOP_FEATURES))), columns=TOP_FEATURES).astype(float)
+        self.X['TotalReimbursement'] = rng.integers(0, 5000, 300)
+        y = (self.X['TotalReimbursement'] > 2500).astype(int) ^ self.X['ChronicCond_Cancer'].astype(int)
+        self.scaler = StandardScaler().fit(self.X)
+        self.model = GradientBoostingClassifier(n_estimators=10, max_depth=3).fit(self.scaler.transform(self.X), y)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_matches_tree_explainer(self):
+        """Test that batch explanations equal TreeExplainer on the scaled rows."""
+        explainer = ClaimExplainer(self.model, self.scaler, n_jobs=1)
+        expected = shap.TreeExplainer(self.model).shap_values(self.scaler.transform(self.X))
+        values = explainer.explain(self.X.values)
+        self.assertEqual(values.dtype, np.float32)
+        np.testing.assert_allclose(values, expected, rtol=1e-5, atol=1e-6)
+
+    def test_parallel_blocks_match(self):
+        """Test that splitting a batch across workers gives the same values."""
+        sequential = ClaimExplainer(self.model, self.scaler, cache_size=0).explain(self.X.values)
+        parallel = ClaimExplainer(self.model, self.scaler, cache_size=0, n_jobs=2, block_size=50).explain(self.X.values)
+        np.testing.assert_array_equal(sequential, parallel)
+
+    def test_lru_cache(self):
+        """Test that repeated claims are served from a bounded cache."""
+        explainer = ClaimExplainer(self.model, self.scaler, cache_size=5, n_jobs=1)
+        first = explainer.explain(self.X.values[:3])
+        np.testing.assert_array_equal(explainer.explain(self.X.values[:3]), first)
+        self.assertEqual((explainer.hits, explainer.misses), (3, 3))
+
+        explainer.explain(self.X.values[3:10])
+        self.assertEqual(len(explainer._cache), 5)
+
+    def test_explain_claims_file(self):
+        """Test that stored float32 explanations can be looked up by ClaimID."""
+        bundle_path = os.path.join(self.tmpdir, 'model.bundle')
+        ModelBundle.from_model(self.model, self.scaler).save(bundle_path)
+        claims = self.X.copy()
+        claims.insert(0, 'ClaimID', [f'CLM{i}' for i in range(len(claims))])
+        input_path = os.path.join(self.tmpdir, 'claims.csv')
+        output_path = os.path.join(self.tmpdir, 'explanations.parquet')
+        claims.to_csv(input_path, index=False)
+
+        result = explain_claims(input_path, output_path, chunksize=100, bundle_path=bundle_path, n_jobs=1)
+        self.assertEqual(result['claims'], 300)
+
+        df, expected_value = load_explanations(output_path, claim_ids=['CLM7', 'CLM250'])
+        self.assertEqual(df['ClaimID'].tolist(), ['CLM7', 'CLM250'])
+        self.assertEqual(df['TotalReimbursement'].dtype, np.float32)
+        explainer = ClaimExplainer(self.model, self.scaler, n_jobs=1)
+        self.assertAlmostEqual(expected_value, explainer.expected_value, places=6)
+        np.testing.assert_array_equal(df[TOP_FEATURES].values, explainer.explain(self.X.values[[7, 250]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.preprocessing import StandardScaler
+
+import preprocess_data
+from incremental_pipeline import ProviderEncoder, ingest_new_files, load_partitions, retrain
+from test_preprocess_data import write_raw_files
+from train_model import TOP_FEATURES
+
+
+class TestIncrementalPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """Run each test in a scratch directory with an empty incoming folder."""
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.mkdtemp()
+        os.chdir(self.tmpdir)
+        write_raw_files()
+        os.mkdir('incoming')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir)
+
+    def test_provider_encoder_only_grows(self):
+        """Test that known providers keep their codes when new ones arrive."""
+        encoder = ProviderEncoder()
+        self.assertEqual(encoder.encode(pd.Series(['PRV2', 'PRV1', 'PRV2'])).tolist(), [1, 0, 1])
+        self.assertEqual(encoder.encode(pd.Series(['PRV0', 'PRV2'])).tolist(), [2, 1])
+
+    def test_ingests_only_new_files(self):
+        """Test that a second run only processes the file that arrived since the first."""
+        shutil.copy(preprocess_data.INPATIENT_PATH, 'incoming/2009-01_Inpatient.csv')
+        first = ingest_new_files('incoming', 'store')
+        self.assertEqual([p['rows'] for p in first], [2])
+        self.assertEqual(ingest_new_files('incoming', 'store'), [])
+
+        shutil.copy(preprocess_data.OUTPATIENT_PATH, 'incoming/2009-02_Outpatient.csv')
+        second = ingest_new_files('incoming', 'store')
+        self.assertEqual([p['file'] for p in second], ['2009-02_Outpatient.csv'])
+
+        df = load_partitions('store')
+        self.assertEqual(len(df), 5)
+        self.assertEqual(df['Provider'].dtype, 'int32')
+        # PRV1 and PRV2 keep their January codes; PRV3 has no label and never reaches the encoder
+        self.assertEqual(df['Provider'].tolist(), [0, 1, 1, 0, 0])
+        self.assertEqual(ProviderEncoder.load('store/provider_encoding.json').mapping, {'PRV1': 0, 'PRV2': 1})
+
+    def test_warm_start_adds_stages_on_new_partitions(self):
+        """Test that warm-start retraining grows the ensemble and skips trained partitions."""
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.integers(0, 2, (50, len(TOP_FEATURES))), columns=TOP_FEATURES)
+        y = rng.integers(0, 2, 50)
+        scaler = StandardScaler().fit(X)
+        joblib.dump(GradientBoostingClassifier(n_estimators=5).fit(scaler.transform(X), y), 'model.pkl')
+        joblib.dump(scaler, 'scaler.pkl')
+
+        shutil.copy(preprocess_data.OUTPATIENT_PATH, 'incoming/2009-02_Outpatient.csv')
+        ingest_new_files('incoming', 'store')
+        result = retrain('store', n_new_estimators=3, model_path='model.pkl', scaler_path='scaler.pkl')
+        self.assertEqual(result['rows'], 3)
+        self.assertEqual(len(joblib.load('model.pkl').estimators_), 8)
+        self.assertIsNone(retrain('store', model_path='model.pkl', scaler_path='scaler.pkl'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import numpy as np
+
+import instrumentation
+from instrumentation import stage, timed, timed_iter
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.clear()
+
+    def test_nested_stages_rows_and_errors(self):
+        """Test that nested, decorated and iterated stages are recorded with parents, rows and errors."""
+        @timed('unit.build')
+        def build(n):
+            return np.zeros((n, 3))
+
+        with stage('unit.outer') as outer:
+            build(5)
+            chunks = list(timed_iter('unit.read', [np.zeros(2), np.zeros(4)]))
+            outer.rows = sum(len(chunk) for chunk in chunks)
+        with self.assertRaises(KeyError):
+            with stage('unit.fail'):
+                raise KeyError('boom')
+
+        records = {(r['stage'], r['rows']): r for r in instrumentation.records()}
+        self.assertEqual(records[('unit.build', 5)]['parent'], 'unit.outer')
+        self.assertIn(('unit.read', 2), records)
+        self.assertIn(('unit.read', 4), records)
+        self.assertIsNone(records[('unit.outer', 6)]['parent'])
+        self.assertEqual(records[('unit.fail', None)]['error'], 'KeyError')
+        self.assertGreaterEqual(records[('unit.outer', 6)]['seconds'], records[('unit.build', 5)]['seconds'])
+
+    def test_tracemalloc_peak_includes_nested_stages(self):
+        """Test that an allocation peak inside a nested stage is also reported by the enclosing stage."""
+        was_tracing = tracemalloc.is_tracing()
+        tracemalloc.start()
+        try:
+            with stage('unit.outer'):
+                with stage('unit.inner'):
+                    block = np.ones(4 * 1024 * 1024)  # 32 MB
+                    del block
+                with stage('unit.after'):
+                    pass
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        records = {r['stage']: r for r in instrumentation.records()}
+        self.assertGreater(records['unit.inner']['tracemalloc_peak_mb'], 30)
+        self.assertGreater(records['unit.outer']['tracemalloc_peak_mb'], 30)
+        self.assertLess(records['unit.after']['tracemalloc_peak_mb'], 1)
+        self.assertLess(abs(records['unit.outer']['tracemalloc_delta_mb']), 1)
+
+    def test_exports(self):
+        """Test the JSON-lines and Prometheus text exports."""
+        for rows in (10, 20):
+            with stage('unit.score', rows=rows):
+                pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.jsonl')
+            instrumentation.write_jsonl(path)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual([line['rows'] for line in lines], [10, 20])
+
+            prom_path = os.path.join(tmp, 'metrics.prom')
+            instrumentation.write_prometheus(prom_path)
+            with open(prom_path) as f:
+                text = f.read()
+        self.assertIn('# TYPE claims_stage_seconds_total counter', text)
+        self.assertIn('claims_stage_calls_total{stage="unit.score"} 2', text)
+        self.assertIn('claims_stage_rows_total{stage="unit.score"} 30', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
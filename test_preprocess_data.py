@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import preprocess_data
+from feature_store import load_cleaned_data
+
+
+def write_raw_files():
+    """Writes a tiny set of raw Kaggle-style files into the current directory."""
+    chronic = {col: [1, 2, 1] for col in preprocess_data.CHRONIC_COLUMNS}
+    pd.DataFrame({
+        'BeneID': ['BENE1', 'BENE2', 'BENE3'], 'DOB': ['1943-01-01'] * 3, 'DOD': [None, None, '2009-12-01'],
+        'Gender': [1, 2, 1], 'Race': [1, 1, 2], 'RenalDiseaseIndicator': ['0', 'Y', '0'], 'State': [39, 1, 5],
+        'County': [230, 10, 20], 'NoOfMonths_PartACov': [12, 12, 12], 'NoOfMonths_PartBCov': [12, 12, 12],
+        **chronic,
+        'IPAnnualReimbursementAmt': [36000, 0, 19000], 'IPAnnualDeductibleAmt': [3204, 0, 1068],
+        'OPAnnualReimbursementAmt': [60, 30, 1100], 'OPAnnualDeductibleAmt': [70, 50, 100],
+    }).to_csv(preprocess_data.BENEFICIARY_PATH, index=False)
+    pd.DataFrame({'Provider': ['PRV1', 'PRV2'], 'PotentialFraud': ['Yes', 'No']}).to_csv(
+        preprocess_data.TRAIN_PATH, index=False)
+    pd.DataFrame({
+        'BeneID': ['BENE1', 'BENE2', 'BENE9'], 'ClaimID': ['CLM1', 'CLM2', 'CLM3'],
+        'Provider': ['PRV1', 'PRV2', 'PRV1'], 'InscClaimAmtReimbursed': [26000, 5000, 700],
+        'AdmissionDt': ['2009-04-12'] * 3, 'ClmAdmitDiagnosisCode': ['7866', 'V420', None],
+        'DeductibleAmtPaid': [1068, 1068, None],
+    }).to_csv(preprocess_data.INPATIENT_PATH, index=False)
+    pd.DataFrame({
+        'BeneID': ['BENE3', 'BENE1', 'BENE2', 'BENE3'], 'ClaimID': ['CLM4', 'CLM5', 'CLM6', 'CLM7'],
+        'Provider': ['PRV2', 'PRV1', 'PRV3', 'PRV1'], 'InscClaimAmtReimbursed': [30, 80, 10, 40],
+        'ClmAdmitDiagnosisCode': [None, '4019', '5990', None], 'DeductibleAmtPaid': [0, 0, 0, None],
+    }).to_csv(preprocess_data.OUTPATIENT_PATH, index=False)
+
+
+class TestPreprocessData(unittest.TestCase):
+
+    def setUp(self):
+        """Run each test in a scratch directory holding the raw files."""
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.mkdtemp()
+        os.chdir(self.tmpdir)
+        write_raw_files()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir)
+
+    def test_encodings(self):
+        """Test that the merged claims are encoded as 0/1 flags."""
+        preprocess_data.preprocess_data(output_path='full.csv')
+        df = pd.read_csv('full.csv')
+        self.assertEqual(len(df), 5)
+        self.assertEqual(df['PotentialFraud'].tolist(), [1, 0, 0, 1, 1])
+        self.assertEqual(df['RenalDiseaseIndicator'].tolist(), [0, 1, 0, 0, 0])
+        self.assertEqual(df['ChronicCond_Cancer'].tolist(), [1, 0, 1, 1, 1])
+        self.assertEqual(df['TotalReimbursement'].iloc[0], 26000 + 36000 + 60)
+
+    def test_chunked_output_matches(self):
+        """Test that the streaming mode writes exactly the same file."""
+        preprocess_data.preprocess_data(output_path='full.csv')
+        for chunksize in (1, 2, 100):
+            preprocess_data.preprocess_data(chunksize=chunksize, output_path='chunked.csv')
+            with open('full.csv') as full, open('chunked.csv') as chunked:
+                self.assertEqual(full.read(), chunked.read())
+
+    def test_parquet_feature_store(self):
+        """Test that the Parquet copy has compact dtypes and the CSV's values."""
+        preprocess_data.preprocess_data(output_path='full.csv')
+        preprocess_data.preprocess_data(chunksize=2, output_path='chunked.csv')
+        full = load_cleaned_data('full.csv')
+        self.assertTrue(os.path.exists('full.parquet'))
+        self.assertEqual(full['ChronicCond_stroke'].dtype, 'int8')
+        self.assertEqual(full['Provider'].dtype, 'int32')
+        self.assertEqual(full['TotalReimbursement'].dtype, 'float32')
+        pd.testing.assert_frame_equal(full, pd.read_parquet('chunked.parquet'))
+
+        os.remove('full.parquet')
+        csv = load_cleaned_data('full.csv', columns=['Provider', 'PotentialFraud'])
+        pd.testing.assert_frame_equal(csv, full[['Provider', 'PotentialFraud']])
+
+if __name__ == '__main__':
+    unittest.main()
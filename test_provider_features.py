@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from provider_features import ProviderFeatureTable, compute_provider_features
+
+
+class TestProviderFeatures(unittest.TestCase):
+
+    def setUp(self):
+        self.inpatient = pd.DataFrame({
+            'Provider': ['PRV2', 'PRV1', 'PRV2'], 'BeneID': ['B1', 'B2', 'B1'],
+            'InscClaimAmtReimbursed': [1000, 3000, 5000],
+            'AttendingPhysician': ['PHY1', 'PHY2', 'PHY3'], 'OperatingPhysician': ['PHY3', None, None],
+            'OtherPhysician': [None, None, 'PHY1'],
+            'AdmissionDt': ['2009-01-01', '2009-02-01', '2009-03-01'],
+            'DischargeDt': ['2009-01-04', '2009-02-11', '2009-03-02'],
+        })
+        self.outpatient = pd.DataFrame({
+            'Provider': ['PRV2', 'PRV3', 'PRV2'], 'BeneID': ['B3', 'B1', 'B1'],
+            'InscClaimAmtReimbursed': [20, 40, None],
+            'AttendingPhysician': ['PHY4', 'PHY1', 'PHY1'], 'OperatingPhysician': [None, None, None],
+            'OtherPhysician': [None, 'PHY1', None],
+        })
+
+    def test_aggregates(self):
+        """Test each provider's aggregates against hand-computed values."""
+        features = compute_provider_features(self.inpatient, self.outpatient).set_index('Provider')
+        self.assertEqual(features.index.tolist(), ['PRV1', 'PRV2', 'PRV3'])
+        prv2 = features.loc['PRV2']
+        self.assertEqual(prv2['ProviderClaimCount'], 4)
+        self.assertEqual(prv2['ProviderReimbursementSum'], 6020)
+        # Amounts 0, 20, 1000, 5000
+        self.assertAlmostEqual(prv2['ProviderReimbursementMedian'], 510)
+        self.assertAlmostEqual(prv2['ProviderReimbursementP90'], 1000 + 0.7 * 4000, places=2)
+        self.assertEqual(prv2['ProviderReimbursementMax'], 5000)
+        self.assertEqual(prv2['ProviderDistinctBeneficiaries'], 2)
+        self.assertEqual(prv2['ProviderDistinctPhysicians'], 3)
+        self.assertAlmostEqual(prv2['ProviderMeanLengthOfStay'], 2)
+        self.assertEqual(prv2['ProviderMaxLengthOfStay'], 3)
+        self.assertAlmostEqual(prv2['ProviderInpatientShare'], 0.5)
+        self.assertEqual(features.loc['PRV3', 'ProviderMeanLengthOfStay'], 0)
+        self.assertEqual(features.loc['PRV3', 'ProviderDistinctPhysicians'], 1)
+
+    def test_lookup_table(self):
+        """Test that the saved table joins onto claims, with zeros for unknown providers."""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'provider_features.parquet')
+            compute_provider_features(self.inpatient, self.outpatient).to_parquet(path, index=False)
+            table = ProviderFeatureTable.load(path)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        claims = pd.DataFrame({'ClaimID': ['C1', 'C2', 'C3'], 'Provider': ['PRV3', 'PRV9', 'PRV1']},
+                              index=[10, 11, 12])
+        joined = table.join(claims)
+        self.assertEqual(joined['ProviderClaimCount'].tolist(), [1, 0, 1])
+        self.assertEqual(joined['ProviderMaxLengthOfStay'].tolist(), [0, 0, 10])
+        self.assertEqual(joined.index.tolist(), [10, 11, 12])
+        np.testing.assert_array_equal(table.lookup(np.array(['PRV9'])), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
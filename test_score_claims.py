@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from preprocess_data import CHRONIC_COLUMNS
+from score_claims import score_claims
+
+
+class TestScoreClaims(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small claims file and matching beneficiary file."""
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        n = 50
+        bene_ids = [f'BENE{i}' for i in range(20)]
+        beneficiary = pd.DataFrame({
+            'BeneID': bene_ids, 'Gender': 1, 'RenalDiseaseIndicator': rng.choice(['0', 'Y'], 20),
+            'NoOfMonths_PartACov': 12, 'NoOfMonths_PartBCov': 12,
+            'IPAnnualReimbursementAmt': rng.integers(0, 50000, 20), 'IPAnnualDeductibleAmt': rng.integers(0, 3000, 20),
+            'OPAnnualReimbursementAmt': rng.integers(0, 5000, 20), 'OPAnnualDeductibleAmt': rng.integers(0, 1000, 20),
+        })
+        for col in CHRONIC_COLUMNS:
+            beneficiary[col] = rng.integers(1, 3, 20)
+        self.beneficiary_path = os.path.join(self.tmpdir, 'beneficiary.csv')
+        beneficiary.to_csv(self.beneficiary_path, index=False)
+
+        claims = pd.DataFrame({
+            'BeneID': rng.choice(bene_ids + ['BENE999'], n), 'ClaimID': [f'CLM{i}' for i in range(n)],
+            'Provider': rng.choice(['PRV1', 'PRV2'], n), 'InscClaimAmtReimbursed': rng.integers(0, 60000, n),
+        })
+        self.claims_path = os.path.join(self.tmpdir, 'claims.csv')
+        claims.to_csv(self.claims_path, index=False)
+        self.expected_rows = claims['BeneID'].isin(bene_ids).sum()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_scores_match_model(self):
+        """Test that chunked scoring gives the model's probabilities for every known claim."""
+        output_path = os.path.join(self.tmpdir, 'scores.csv')
+        stats = score_claims(self.claims_path, output_path, beneficiary_path=self.beneficiary_path, chunksize=7)
+        scores = pd.read_csv(output_path)
+        self.assertEqual(list(scores.columns), ['ClaimID', 'Provider', 'FraudProbability'])
+        self.assertEqual(len(scores), self.expected_rows)
+        self.assertEqual(stats['rows_scored'], self.expected_rows)
+
+        # Score the same claims in one go through the model directly
+        model = joblib.load('claims_fraud_detection.pkl')
+        scaler = joblib.load('scaler.pkl')
+        claims = pd.read_csv(self.claims_path)
+        beneficiary = pd.read_csv(self.beneficiary_path)
+        df = claims.merge(beneficiary, on='BeneID')
+        df['RenalDiseaseIndicator'] = (df['RenalDiseaseIndicator'] == 'Y').astype(int)
+        for col in CHRONIC_COLUMNS:
+            df[col] = (df[col] == 1).astype(int)
+        df['TotalReimbursement'] = df['InscClaimAmtReimbursed'] + df['IPAnnualReimbursementAmt'] + df['OPAnnualReimbursementAmt']
+        df['Provider'] = 0
+        expected = model.predict_proba(scaler.transform(df[scaler.feature_names_in_]))[:, 1]
+        np.testing.assert_allclose(scores['FraudProbability'], expected)
+
+    def test_process_pool_matches_serial(self):
+        """Test that fanning chunks out to worker processes keeps order and values."""
+        serial_path = os.path.join(self.tmpdir, 'serial.parquet')
+        pool_path = os.path.join(self.tmpdir, 'pool.parquet')
+        score_claims(self.claims_path, serial_path, beneficiary_path=self.beneficiary_path, chunksize=7)
+        score_claims(self.claims_path, pool_path, beneficiary_path=self.beneficiary_path, chunksize=7, workers=2)
+        pd.testing.assert_frame_equal(pd.read_parquet(serial_path), pd.read_parquet(pool_path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import threading
+import unittest
+from http.client import HTTPConnection
+
+import numpy as np
+
+from load_test import SAMPLE_CLAIM
+from scoring_server import MicroBatcher, make_server
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test that requests arriving within the latency budget are scored together."""
+        batch_sizes = []
+
+        def score_fn(X):
+            batch_sizes.append(len(X))
+            return X[:, 0] * 2
+
+        batcher = MicroBatcher(score_fn, max_batch_size=100, max_latency_ms=200)
+        futures = [batcher.submit(np.array([[float(i)]])) for i in range(10)]
+        results = [future.result()[0] for future in futures]
+        batcher.close()
+
+        self.assertEqual(results, [i * 2.0 for i in range(10)])
+        self.assertEqual(batch_sizes, [10])
+
+    def test_batch_size_limit(self):
+        """Test that a full batch is scored without waiting for the deadline."""
+        batch_sizes = []
+        batcher = MicroBatcher(lambda X: batch_sizes.append(len(X)) or X[:, 0], max_batch_size=4, max_latency_ms=200)
+        futures = [batcher.submit(np.zeros((2, 1))) for _ in range(4)]
+        for future in futures:
+            future.result()
+        batcher.close()
+        self.assertEqual(batch_sizes, [4, 4])
+
+
+class TestScoringServer(unittest.TestCase):
+
+    def setUp(self):
+        """Start a server on a free local port."""
+        self.server = make_server(port=0, max_latency_ms=1)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.conn = HTTPConnection('127.0.0.1', self.server.server_address[1])
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.batcher.close()
+
+    def post(self, body, content_type):
+        self.conn.request('POST', '/score', body=body, headers={'Content-Type': content_type})
+        response = self.conn.getresponse()
+        return response.status, response.read().decode('utf-8')
+
+    def test_single_claim(self):
+        """Test that a single claim gets its fraud probability."""
+        status, body = self.post(json.dumps(SAMPLE_CLAIM), 'application/json')
+        self.assertEqual(status, 200)
+        result = json.loads(body)
+        self.assertEqual(result['ClaimID'], 'CLM-LOADTEST')
+        expected = self.server.scorer.predict_proba(self.server.scorer.to_rows([SAMPLE_CLAIM]))[0]
+        self.assertAlmostEqual(result['FraudProbability'], expected)
+
+    def test_json_lines_batch(self):
+        """Test that a JSON-lines body returns one result line per claim."""
+        claims = [dict(SAMPLE_CLAIM, ClaimID=f'CLM{i}', InscClaimAmtReimbursed=i * 1000) for i in range(5)]
+        status, body = self.post('\n'.join(json.dumps(c) for c in claims), 'application/jsonl')
+        self.assertEqual(status, 200)
+        results = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r['ClaimID'] for r in results], [c['ClaimID'] for c in claims])
+
+    def test_missing_feature(self):
+        """Test that a claim without all model features is rejected."""
+        claim = dict(SAMPLE_CLAIM)
+        del claim['TotalReimbursement']
+        status, body = self.post(json.dumps(claim), 'application/json')
+        self.assertEqual(status, 400)
+        self.assertIn('TotalReimbursement', json.loads(body)['error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from train_model import TOP_FEATURES, compare_backends, train_model
+
+
+class TestTrainModel(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small cleaned dataset where the amounts carry the fraud signal."""
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        n = 600
+        df = pd.DataFrame({col: rng.integers(0, 2, n) for col in TOP_FEATURES})
+        df['Provider'] = 0
+        df['PotentialFraud'] = rng.integers(0, 2, n)
+        for col in ['InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt', 'IPAnnualDeductibleAmt', 'TotalReimbursement']:
+            df[col] = rng.integers(0, 5000, n) + 5000 * df['PotentialFraud']
+        self.data_path = os.path.join(self.tmpdir, 'claims_cleaned_data.csv')
+        df.to_csv(self.data_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_backends_save_usable_artifacts(self):
+        """Test that every backend writes a model and scaler the app can use."""
+        for backend in ('gb', 'hist', 'xgboost'):
+            model_path = os.path.join(self.tmpdir, f'{backend}.pkl')
+            scaler_path = os.path.join(self.tmpdir, f'{backend}_scaler.pkl')
+            result = train_model(self.data_path, backend=backend, model_path=model_path, scaler_path=scaler_path)
+            self.assertGreater(result['roc_auc'], 0.9)
+
+            model = joblib.load(model_path)
+            scaler = joblib.load(scaler_path)
+            sample = pd.DataFrame([[0] * len(TOP_FEATURES)], columns=TOP_FEATURES)
+            self.assertIn(model.predict(scaler.transform(sample))[0], [0, 1])
+
+    def test_compare_backends(self):
+        """Test that the comparison reports time and ROC-AUC per backend without saving."""
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir)
+        try:
+            results = compare_backends(self.data_path, backends=('hist', 'xgboost'))
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(results['backend'].tolist(), ['hist', 'xgboost'])
+        self.assertEqual(list(results.columns), ['backend', 'seconds', 'roc_auc'])
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, 'scaler.pkl')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import tree_engine
+from tree_engine import TreeEnsemble
+
+
+class TestTreeEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Export the shipped model and build raw test claims."""
+        self.model = joblib.load('claims_fraud_detection.pkl')
+        self.scaler = joblib.load('scaler.pkl')
+        self.engine = TreeEnsemble.from_model(self.model, self.scaler)
+        rng = np.random.default_rng(0)
+        X = np.abs(rng.normal(self.scaler.mean_, self.scaler.scale_, size=(5000, len(self.scaler.mean_)))).round()
+        self.X = pd.DataFrame(X, columns=self.scaler.feature_names_in_)
+
+    def expected(self, X):
+        return self.model.predict_proba(self.scaler.transform(X))
+
+    def test_matches_predict_proba(self):
+        """Test that raw features score the same as scaler.transform plus predict_proba."""
+        np.testing.assert_allclose(self.engine.predict_proba(self.X.values), self.expected(self.X), rtol=0, atol=1e-9)
+
+    def test_values_on_split_thresholds(self):
+        """Test claims whose values sit exactly on the folded split points."""
+        rows = np.repeat(self.X.values[:1], 200, axis=0)
+        splits = np.flatnonzero(np.isfinite(self.engine.threshold))[:200]
+        rows[np.arange(len(splits)), self.engine.feature[splits]] = self.engine.threshold[splits]
+        X = pd.DataFrame(rows[:len(splits)], columns=self.X.columns)
+        np.testing.assert_allclose(self.engine.predict_proba(X.values), self.expected(X), rtol=0, atol=1e-9)
+
+    def test_numpy_fallback(self):
+        """Test that the pure NumPy path gives the same scores as the compiled one."""
+        njit = tree_engine.njit
+        tree_engine.njit = None
+        try:
+            fallback = self.engine.predict_proba(self.X.values)
+        finally:
+            tree_engine.njit = njit
+        np.testing.assert_allclose(fallback, self.expected(self.X), rtol=0, atol=1e-9)
+
+    def test_save_and_load(self):
+        """Test that a saved engine scores the same after loading."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'engine.npz')
+            self.engine.save(path)
+            loaded = TreeEnsemble.load(path)
+        self.assertEqual(loaded.feature_names, list(self.scaler.feature_names_in_))
+        np.testing.assert_array_equal(loaded.predict_proba(self.X.values), self.engine.predict_proba(self.X.values))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from train_model import TOP_FEATURES
+from tune_model import search_hyperparameters
+
+PARAM_DISTRIBUTIONS = {'n_estimators': [5, 10, 20], 'max_depth': [2, 3, 4]}
+
+
+class TestTuneModel(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small cleaned dataset where the amounts carry the fraud signal."""
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        n = 1200
+        df = pd.DataFrame({col: rng.integers(0, 2, n) for col in TOP_FEATURES})
+        df['PotentialFraud'] = rng.integers(0, 2, n)
+        df['TotalReimbursement'] = rng.integers(0, 5000, n) + 3000 * df['PotentialFraud']
+        self.data_path = os.path.join(self.tmpdir, 'claims_cleaned_data.csv')
+        df.to_csv(self.data_path, index=False)
+        self.results_path = os.path.join(self.tmpdir, 'search_results.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def search(self, method='halving'):
+        return search_hyperparameters(self.data_path, method=method, n_candidates=9, factor=3, cv=3, n_jobs=1,
+                                      param_distributions=PARAM_DISTRIBUTIONS, results_path=self.results_path,
+                                      cache_dir=os.path.join(self.tmpdir, 'cache'))
+
+    def count_fits(self):
+        with open(self.results_path) as f:
+            return sum(1 for _ in f)
+
+    def test_halving_narrows_candidates(self):
+        """Test that only the best third of the candidates reaches the full folds."""
+        best = self.search()
+        # 9 candidates x 3 folds in the first rung, then 3 candidates x 3 folds
+        self.assertEqual(self.count_fits(), 27 + 9)
+        self.assertIn(best['params']['n_estimators'], PARAM_DISTRIBUTIONS['n_estimators'])
+        self.assertGreater(best['roc_auc'], 0.8)
+
+    def test_resume_skips_finished_fits(self):
+        """Test that rerunning a search reuses the fits on disk."""
+        first = self.search()
+        with open(self.results_path) as f:
+            lines = f.readlines()
+        # Simulate an interruption half way through the search
+        with open(self.results_path, 'w') as f:
+            f.writelines(lines[:20])
+        resumed = self.search()
+        self.assertEqual(self.count_fits(), len(lines))
+        self.assertEqual(resumed, first)
+
+    def test_random_search(self):
+        """Test that randomized search fits every candidate on the full folds."""
+        self.search(method='random')
+        self.assertEqual(self.count_fits(), 27)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,49 +1,45 @@
+import argparse
+import time
+
 import pandas as pd
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import roc_auc_score
 import joblib
 import logging
 
+import instrumentation
+from feature_store import CLEANED_DATA_PATH, load_cleaned_data, load_provider_encoding, provider_encoding_path_for
+from instrumentation import stage, timed
+from model_bundle import bundle_path_for, save_bundle
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def train_model(data_path='claims_cleaned_data.csv'):
-    """
-    Trains the fraud detection model.
+MODEL_PATH = 'claims_fraud_detection.pkl'
+SCALER_PATH = 'scaler.pkl'
 
-    Args:
-        data_path (str): The path to the cleaned claims data.
-    """
-    logging.info("Starting model training...")
+# The ordered feature schema. Trained models carry it in their bundle, so scoring code reads it from there
+TOP_FEATURES = ['Provider', 'InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt',
+                'IPAnnualDeductibleAmt', 'TotalReimbursement', 'RenalDiseaseIndicator',
+                'ChronicCond_Alzheimer', 'ChronicCond_Heartfailure', 'ChronicCond_KidneyDisease',
+                'ChronicCond_Cancer', 'ChronicCond_ObstrPulmonary', 'ChronicCond_Depression',
+                'ChronicCond_Diabetes', 'ChronicCond_IschemicHeart', 'ChronicCond_Osteoporasis',
+                'ChronicCond_rheumatoidarthritis', 'ChronicCond_stroke']
 
-    # Load data
-    try:
-        df = pd.read_csv(data_path)
-        logging.info("Data loaded successfully.")
-    except FileNotFoundError:
-        logging.error(f"Data file not found at {data_path}. Please provide the correct path.")
-        return
-
-    # Define features and target
-    top_features = ['Provider', 'InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt',
-                    'IPAnnualDeductibleAmt', 'TotalReimbursement', 'RenalDiseaseIndicator',
-                    'ChronicCond_Alzheimer', 'ChronicCond_Heartfailure', 'ChronicCond_KidneyDisease',
-                    'ChronicCond_Cancer', 'ChronicCond_ObstrPulmonary', 'ChronicCond_Depression',
-                    'ChronicCond_Diabetes', 'ChronicCond_IschemicHeart', 'ChronicCond_Osteoporasis',
-                    'ChronicCond_rheumatoidarthritis', 'ChronicCond_stroke']
-    X = df[top_features]
-    y = df['PotentialFraud']
-    logging.info("Features and target defined.")
-
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
-    logging.info("Data split into training and testing sets.")
 
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    logging.info("Features scaled.")
+def _fit_gb(X_train, y_train, params=None):
+    """
+    Exact-split GradientBoostingClassifier tuned with GridSearchCV (the
+    original model). When params are given, e.g. from tune_model.py, they
+    are fitted directly instead.
+    """
+    if params is not None:
+        model = GradientBoostingClassifier(random_state=42, **params)
+        model.fit(X_train, y_train)
+        logging.info(f"Model trained with {params}.")
+        return model
 
     # Define the parameter grid
     param_grid_gb = {
@@ -58,13 +54,170 @@ def train_model(data_path='claims_cleaned_data.csv'):
     # Initialize and train the model with GridSearchCV
     gb = GradientBoostingClassifier(random_state=42)
     grid_search_gb = GridSearchCV(estimator=gb, param_grid=param_grid_gb, cv=5, n_jobs=-1, verbose=2, scoring='roc_auc')
-    grid_search_gb.fit(X_train_scaled, y_train)
+    grid_search_gb.fit(X_train, y_train)
     logging.info("Model training with GridSearchCV completed.")
+    return grid_search_gb.best_estimator_
+
+
+def _fit_hist(X_train, y_train):
+    """
+    Histogram-based boosting on all cores. Boosting stops once the loss on
+    a 10% validation split has not improved for 10 iterations.
+    """
+    model = HistGradientBoostingClassifier(max_iter=500, learning_rate=0.1, max_depth=5, min_samples_leaf=6,
+                                           early_stopping=True, validation_fraction=0.1, n_iter_no_change=10,
+                                           random_state=42)
+    model.fit(X_train, y_train)
+    logging.info(f"HistGradientBoostingClassifier stopped after {model.n_iter_} iterations.")
+    return model
+
+
+def _fit_xgboost(X_train, y_train):
+    """
+    XGBoost with hist tree building on all cores. Boosting stops once the
+    ROC-AUC on a 10% validation split has not improved for 10 rounds.
+    """
+    from xgboost import XGBClassifier
+
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.1, stratify=y_train, random_state=42)
+    model = XGBClassifier(n_estimators=500, learning_rate=0.1, max_depth=5, tree_method='hist', n_jobs=-1,
+                          early_stopping_rounds=10, eval_metric='auc', random_state=42)
+    model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    logging.info(f"XGBoost stopped after {model.best_iteration + 1} rounds.")
+    return model
+
+
+BACKENDS = {
+    'gb': _fit_gb,
+    'hist': _fit_hist,
+    'xgboost': _fit_xgboost,
+}
+
+
+def load_training_data(data_path=CLEANED_DATA_PATH):
+    """
+    Loads the model features and target and splits them 80/20.
+
+    Returns:
+        tuple: X_train, X_test, y_train, y_test, or None if the data file is missing.
+    """
+    # Load only the columns the model needs
+    try:
+        with stage('train.load') as load:
+            df = load_cleaned_data(data_path, columns=TOP_FEATURES + ['PotentialFraud'])
+            load.rows = len(df)
+        logging.info("Data loaded successfully.")
+    except FileNotFoundError:
+        logging.error(f"Data file not found at {data_path}. Please provide the correct path.")
+        return None
+
+    X = df[TOP_FEATURES]
+    y = df['PotentialFraud']
+    logging.info("Features and target defined.")
+
+    # Split data
+    with stage('train.split', rows=len(X)):
+        split = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    logging.info("Data split into training and testing sets.")
+    return split
+
+
+@timed('train')
+def train_model(data_path=CLEANED_DATA_PATH, backend='gb', model_path=MODEL_PATH, scaler_path=SCALER_PATH,
+                split=None, params=None, provider_encoding=None):
+    """
+    Trains the fraud detection model.
+
+    Args:
+        data_path (str): The path to the cleaned claims data. A Parquet copy
+            next to the CSV is preferred when present.
+        backend (str): 'gb' for the exact-split GradientBoostingClassifier,
+            'hist' for HistGradientBoostingClassifier or 'xgboost'.
+        model_path (str): Where to save the model. None skips saving the artifacts.
+            For the 'gb' backend, a model bundle (see model_bundle.py) with
+            the scaler, trees, feature schema and Provider encoding is saved
+            next to it for scoring; the pickles are kept for warm-start retraining.
+        scaler_path (str): Where to save the scaler.
+        split (tuple, optional): A precomputed load_training_data() result.
+        params (dict, optional): Fixed GradientBoostingClassifier parameters
+            for the 'gb' backend, skipping its grid search.
+        provider_encoding (dict, optional): Provider ID -> code mapping for
+            the bundle. By default the one preprocess_data() wrote next to data_path.
+
+    Returns:
+        dict: The backend, fit time in seconds and ROC-AUC on the held-out split.
+    """
+    logging.info(f"Starting model training with the '{backend}' backend...")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    if params is not None and backend != 'gb':
+        raise ValueError("Fixed parameters are only supported by the 'gb' backend")
+
+    if split is None:
+        split = load_training_data(data_path)
+        if split is None:
+            return None
+    X_train, X_test, y_train, y_test = split
+
+    # Scale features
+    with stage('train.scale', rows=len(X_train)):
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+    logging.info("Features scaled.")
+
+    start = time.perf_counter()
+    with stage('train.fit', rows=len(X_train), backend=backend):
+        if params is not None:
+            model = _fit_gb(X_train_scaled, y_train, params)
+        else:
+            model = BACKENDS[backend](X_train_scaled, y_train)
+    seconds = time.perf_counter() - start
+
+    with stage('train.evaluate', rows=len(X_test)):
+        roc_auc = roc_auc_score(y_test, model.predict_proba(scaler.transform(X_test))[:, 1])
+    logging.info(f"Trained '{backend}' in {seconds:.1f}s with a test ROC-AUC of {roc_auc:.4f}.")
 
     # Save the model and scaler
-    joblib.dump(grid_search_gb.best_estimator_, 'claims_fraud_detection.pkl')
-    joblib.dump(scaler, 'scaler.pkl')
-    logging.info("Model and scaler saved successfully.")
+    if model_path is not None:
+        with stage('train.save'):
+            joblib.dump(model, model_path)
+            joblib.dump(scaler, scaler_path)
+            logging.info("Model and scaler saved successfully.")
+            if backend == 'gb':
+                if provider_encoding is None:
+                    provider_encoding = load_provider_encoding(provider_encoding_path_for(data_path))
+                save_bundle(model, scaler, bundle_path_for(model_path), provider_encoding,
+                            {'backend': backend, 'roc_auc': roc_auc, 'rows': len(X_train) + len(X_test)})
+            else:
+                logging.warning(f"Model bundles only support the 'gb' backend; '{backend}' is saved as pickles only.")
+    return {'backend': backend, 'seconds': seconds, 'roc_auc': roc_auc}
+
+
+def compare_backends(data_path=CLEANED_DATA_PATH, backends=tuple(BACKENDS)):
+    """
+    Trains every backend on the same split without saving any artifacts
+    and logs wall-clock time and ROC-AUC side by side.
+
+    Returns:
+        pd.DataFrame: One row per backend.
+    """
+    split = load_training_data(data_path)
+    if split is None:
+        return None
+    results = pd.DataFrame([train_model(backend=backend, model_path=None, split=split) for backend in backends])
+    logging.info("Backend comparison:\n" + results.to_string(index=False, float_format='{:.4f}'.format))
+    return results
+
 
 if __name__ == '__main__':
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the fraud detection model.')
+    parser.add_argument('--data', default=CLEANED_DATA_PATH, help='Cleaned claims data.')
+    parser.add_argument('--backend', default='gb', choices=list(BACKENDS) + ['compare'],
+                        help="Training backend, or 'compare' to time every backend without saving.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session(args):
+        if args.backend == 'compare':
+            compare_backends(args.data)
+        else:
+            train_model(args.data, backend=args.backend)
@@ -0,0 +1,256 @@
+import argparse
+import time
+
+import numpy as np
+from scipy.special import expit, logit
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+ENGINE_PATH = 'claims_fraud_detection.npz'
+
+
+def fold_thresholds(threshold, mean, scale, iterations=200):
+    """
+    Moves split thresholds from scaled space into raw feature space.
+
+    sklearn trees compare float32(x_scaled) <= t, so the exact raw cut point
+    is the largest x with float32((x - mean) / scale) <= t rather than just
+    t * scale + mean. The mapping is monotone, so it is found by bisection
+    (vectorized over all splits) starting from that estimate.
+    """
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    lo = threshold * scale + mean
+    hi = lo.copy()
+    step = np.abs(lo) * 1e-6 + 1e-6
+    while True:
+        mask = ~goes_left(lo)
+        if not mask.any():
+            break
+        lo[mask] -= step[mask]
+        step[mask] *= 2
+    step = np.abs(hi) * 1e-6 + 1e-6
+    while True:
+        mask = goes_left(hi)
+        if not mask.any():
+            break
+        hi[mask] += step[mask]
+        step[mask] *= 2
+
+    for _ in range(iterations):
+        mid = lo + (hi - lo) / 2
+        left = goes_left(mid)
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+    return lo
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True, boundscheck=False)
+    def _decision_function_compiled(X, feature, threshold, children, value, roots, init_raw, max_depth, out):
+        # Blocks of rows run in parallel; within a block trees are walked one at a time
+        # so each tree's nodes stay in cache, and sums follow sklearn's tree order
+        block = 1024
+        n = X.shape[0]
+        for b in prange((n + block - 1) // block):
+            start = b * block
+            stop = min(start + block, n)
+            for i in range(start, stop):
+                out[i] = init_raw
+            for root in roots:
+                for i in range(start, stop):
+                    node = root
+                    for _ in range(max_depth):
+                        node = children[node] + (X[i, feature[node]] > threshold[node])
+                    out[i] += value[node]
+
+
+class TreeEnsemble:
+    """
+    A gradient boosted tree ensemble flattened into contiguous NumPy arrays.
+
+    Nodes are numbered breadth-first within each tree so that the two
+    children of node i are children[i] (feature[i] <= threshold[i]) and
+    children[i] + 1 (otherwise). Leaves point back at themselves with an
+    infinite threshold, so every sample can be walked down all trees for
+    exactly max_depth steps without branching. value holds each leaf's
+    contribution to the log-odds, already multiplied by the learning rate,
+    and roots holds the index of each tree's root node.
+
+    Scoring only needs NumPy and SciPy, so worker processes do not have to
+    import scikit-learn. When numba is installed (it comes with shap) the
+    trees are walked by a compiled, multi-threaded kernel instead.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, init_raw, max_depth, feature_names):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.init_raw = float(init_raw)
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+
+    @classmethod
+    def from_model(cls, model, scaler=None):
+        """
+        Exports a fitted binary GradientBoostingClassifier.
+
+        When the StandardScaler the model was trained behind is given, it is
+        folded into the thresholds (see fold_thresholds()), so raw features
+        can be scored directly.
+        """
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("Only binary classifiers can be exported")
+        n_features = model.n_features_in_
+        if scaler is not None:
+            mean, scale = scaler.mean_, scaler.scale_
+            feature_names = scaler.feature_names_in_
+        else:
+            mean, scale = np.zeros(n_features), np.ones(n_features)
+            feature_names = getattr(model, 'feature_names_in_', [f'x{i}' for i in range(n_features)])
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_[:, 0]:
+            tree = estimator.tree_
+
+            # Breadth-first order puts every pair of siblings next to each other
+            order = [0]
+            position = np.zeros(tree.node_count, dtype=np.int64)
+            for node in order:
+                if tree.children_left[node] != -1:
+                    position[tree.children_left[node]] = len(order)
+                    order.append(tree.children_left[node])
+                    position[tree.children_right[node]] = len(order)
+                    order.append(tree.children_right[node])
+            order = np.array(order)
+
+            is_leaf = tree.children_left[order] == -1
+            split = ~is_leaf
+            feature = np.where(is_leaf, 0, tree.feature[order])
+            threshold = np.full(tree.node_count, np.inf)
+            threshold[split] = fold_thresholds(tree.threshold[order][split], mean[feature[split]],
+                                               scale[feature[split]])
+            child = np.where(is_leaf, np.arange(tree.node_count), position[tree.children_left[order]])
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(child + offset)
+            values.append(model.learning_rate * tree.value[order, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        if model.init_ == 'zero':
+            init_raw = 0.0
+        else:
+            eps = np.finfo(np.float32).eps
+            prior = model.init_.predict_proba(np.zeros((1, n_features)))[0, 1]
+            init_raw = logit(np.clip(prior, eps, 1 - eps))
+
+        max_depth = max(estimator.tree_.max_depth for estimator in model.estimators_[:, 0])
+        return cls(np.concatenate(features).astype(np.int64), np.concatenate(thresholds),
+                   np.concatenate(children).astype(np.int64), np.concatenate(values),
+                   np.array(roots, dtype=np.int64), init_raw, max_depth, feature_names)
+
+    def save(self, path=ENGINE_PATH):
+        np.savez(path, feature=self.feature, threshold=self.threshold, children=self.children, value=self.value,
+                 roots=self.roots, init_raw=self.init_raw, max_depth=self.max_depth,
+                 feature_names=np.array(self.feature_names))
+
+    @classmethod
+    def load(cls, path=ENGINE_PATH):
+        with np.load(path) as data:
+            return cls(data['feature'], data['threshold'], data['children'], data['value'], data['roots'],
+                       data['init_raw'], data['max_depth'], data['feature_names'].tolist())
+
+    def decision_function(self, X, block_size=8192):
+        """
+        Returns the raw log-odds for each row of X (unscaled features).
+
+        Without numba, all trees are walked at once for a block of rows, which
+        keeps the number of NumPy calls per block independent of the number
+        of trees.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected an array of shape (n, {len(self.feature_names)})")
+        raw = np.empty(len(X))
+        if njit is not None:
+            _decision_function_compiled(X, self.feature, self.threshold, self.children, self.value,
+                                        self.roots, self.init_raw, self.max_depth, raw)
+            return raw
+        for start in range(0, len(X), block_size):
+            block = X[start:start + block_size]
+            rows = np.arange(len(block))[:, None]
+            node = np.broadcast_to(self.roots, (len(block), len(self.roots)))
+            for _ in range(self.max_depth):
+                node = self.children[node] + (block[rows, self.feature[node]] > self.threshold[node])
+            raw[start:start + block_size] = self.init_raw + self.value[node].sum(axis=1)
+        return raw
+
+    def predict_proba(self, X):
+        """Returns class probabilities with the same layout as GradientBoostingClassifier.predict_proba."""
+        proba = expit(self.decision_function(X))
+        return np.column_stack([1 - proba, proba])
+
+
+def benchmark(model, scaler, engine, batch_sizes=(1, 10, 100, 1000, 10000, 100000, 1000000), seed=42):
+    """
+    Times sklearn's scaler.transform plus predict_proba against the exported
+    engine on random claims and checks that the probabilities agree.
+
+    Returns:
+        list: One dict per batch size with both timings and the largest difference.
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for n in batch_sizes:
+        X = np.abs(rng.normal(scaler.mean_, scaler.scale_, size=(n, len(scaler.mean_)))).round()
+        repeats = max(1, min(200, 10000 // n))
+        engine.predict_proba(X[:1])  # compile the numba kernel outside the timed loop
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            expected = model.predict_proba(scaler.transform(X))[:, 1]
+        sklearn_seconds = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            actual = engine.predict_proba(X)[:, 1]
+        engine_seconds = (time.perf_counter() - start) / repeats
+
+        results.append({'batch_size': n, 'sklearn_ms': sklearn_seconds * 1000, 'engine_ms': engine_seconds * 1000,
+                        'max_abs_diff': float(np.max(np.abs(expected - actual)))})
+    return results
+
+
+if __name__ == '__main__':
+    import joblib
+    import warnings
+
+    parser = argparse.ArgumentParser(description='Export the trained model to a NumPy tree engine.')
+    parser.add_argument('--model', default='claims_fraud_detection.pkl', help='Trained model pickle.')
+    parser.add_argument('--scaler', default='scaler.pkl', help='Fitted scaler pickle.')
+    parser.add_argument('--output', default=ENGINE_PATH, help='Where to save the exported arrays.')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark against sklearn after exporting.')
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    engine = TreeEnsemble.from_model(model, scaler)
+    engine.save(args.output)
+    print(f"Exported {len(engine.roots)} trees ({len(engine.value)} nodes) to '{args.output}'")
+
+    if args.benchmark:
+        # The scaler was fitted on a DataFrame; plain arrays are fine here
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        print(f"{'batch':>8} {'sklearn ms':>12} {'engine ms':>12} {'speedup':>8} {'max diff':>10}")
+        for r in benchmark(model, scaler, engine):
+            print(f"{r['batch_size']:>8} {r['sklearn_ms']:>12.3f} {r['engine_ms']:>12.3f} "
+                  f"{r['sklearn_ms'] / r['engine_ms']:>7.1f}x {r['max_abs_diff']:>10.1e}")
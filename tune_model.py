@@ -0,0 +1,186 @@
+import argparse
+import json
+import logging
+import math
+import os
+import time
+
+import numpy as np
+from joblib import Memory, Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from feature_store import CLEANED_DATA_PATH
+from train_model import load_training_data, train_model
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+RESULTS_PATH = 'search_results.jsonl'
+CACHE_DIR = '.search_cache'
+
+# The search space for GradientBoostingClassifier
+PARAM_DISTRIBUTIONS = {
+    'n_estimators': [100, 200, 300],
+    'learning_rate': [0.03, 0.05, 0.1, 0.2],
+    'max_depth': [3, 4, 5, 6],
+    'min_samples_split': [2, 10, 20],
+    'min_samples_leaf': [1, 6, 20],
+    'subsample': [0.8, 1.0],
+}
+
+
+def scale_folds(X, y, n_splits=5, random_state=42):
+    """
+    Splits the training data into stratified folds and scales each fold with
+    a StandardScaler fitted on its own training part.
+
+    Returns:
+        list: (X_fit, y_fit, X_val, y_val) per fold, as float64 arrays.
+    """
+    folds = []
+    X, y = np.asarray(X, dtype=np.float64), np.asarray(y)
+    for fit_idx, val_idx in StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(X, y):
+        scaler = StandardScaler().fit(X[fit_idx])
+        folds.append((scaler.transform(X[fit_idx]), y[fit_idx], scaler.transform(X[val_idx]), y[val_idx]))
+    return folds
+
+
+def _evaluate(params, fold, X_fit, y_fit, X_val, y_val, n_samples):
+    """
+    Fits one candidate on the first n_samples rows of a fold and scores it.
+    The training split comes shuffled from train_test_split, so the first
+    rows are a random subsample.
+    """
+    start = time.perf_counter()
+    model = GradientBoostingClassifier(random_state=42, **params)
+    model.fit(X_fit[:n_samples], y_fit[:n_samples])
+    roc_auc = roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+    return {'params': params, 'n_samples': int(n_samples), 'fold': fold, 'roc_auc': float(roc_auc),
+            'fit_seconds': time.perf_counter() - start}
+
+
+def _result_key(params, n_samples, fold):
+    return json.dumps(params, sort_keys=True), int(n_samples), int(fold)
+
+
+def _load_results(results_path):
+    """Reads finished evaluations back from an earlier (possibly interrupted) run."""
+    results = {}
+    if os.path.exists(results_path):
+        with open(results_path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    results[_result_key(record['params'], record['n_samples'], record['fold'])] = record
+    return results
+
+
+def search_hyperparameters(data_path=CLEANED_DATA_PATH, method='halving', n_candidates=27, factor=3,
+                           min_resources='auto', cv=5, n_jobs=-1, param_distributions=PARAM_DISTRIBUTIONS,
+                           results_path=RESULTS_PATH, cache_dir=CACHE_DIR, random_state=42):
+    """
+    Searches GradientBoostingClassifier parameters by cross-validated ROC-AUC.
+
+    'halving' runs successive halving: every candidate is first fitted on
+    min_resources training rows per fold, and only the best 1/factor of
+    them move on to a rung with factor times more rows, until one candidate
+    is left or the full fold is used. 'random' fits every candidate on the
+    full folds. The scaled folds are computed once and cached in cache_dir.
+    Every fit is appended to results_path as it finishes, so rerunning the
+    same search after an interruption skips the fits that are already done.
+
+    Args:
+        data_path (str): The path to the cleaned claims data.
+        method (str): 'halving' or 'random'.
+        n_candidates (int): Number of parameter sets sampled from param_distributions.
+        factor (int): Halving rate between rungs.
+        min_resources (int or 'auto'): Rows per fold in the first rung. 'auto'
+            picks it so that the last rung uses the full folds.
+        cv (int): Number of folds.
+        n_jobs (int): Parallel fits.
+        param_distributions (dict): Lists of values to sample candidates from.
+        results_path (str): JSON-lines file of finished fits, used for resuming.
+        cache_dir (str): Directory for the cached scaled folds. None disables it.
+        random_state (int): Seed for candidate sampling and fold splitting.
+
+    Returns:
+        dict: The best parameters, their mean ROC-AUC and the number of rows
+        per fold they were scored on.
+    """
+    split = load_training_data(data_path)
+    if split is None:
+        return None
+    X_train, _, y_train, _ = split
+
+    memory = Memory(cache_dir, verbose=0)
+    folds = memory.cache(scale_folds)(X_train.values, y_train.values, cv, random_state)
+    logging.info(f"{cv} scaled folds ready.")
+
+    candidates = list(ParameterSampler(param_distributions, n_candidates, random_state=random_state))
+    candidates = [{key: value.item() if hasattr(value, 'item') else value for key, value in params.items()}
+                  for params in candidates]
+    max_resources = min(len(fold[1]) for fold in folds)
+    if method == 'random':
+        rungs = [max_resources]
+    elif method == 'halving':
+        # Enough rungs to narrow the candidates down to a handful on the full folds
+        n_rungs = 1
+        while factor ** n_rungs < len(candidates):
+            n_rungs += 1
+        if min_resources == 'auto':
+            min_resources = max(max_resources // factor ** (n_rungs - 1), 100)
+        rungs = [min(min_resources * factor ** r, max_resources) for r in range(n_rungs)]
+    else:
+        raise ValueError("method must be 'halving' or 'random'")
+
+    done = _load_results(results_path)
+    if done:
+        logging.info(f"Resuming search with {len(done)} finished fits from {results_path}.")
+
+    with open(results_path, 'a') as results_file:
+        for rung, n_samples in enumerate(rungs):
+            tasks = [(params, fold) for params in candidates for fold in range(cv)
+                     if _result_key(params, n_samples, fold) not in done]
+            logging.info(f"Rung {rung}: {len(candidates)} candidates on {n_samples} rows per fold "
+                         f"({len(tasks)} fits to run).")
+            fits = Parallel(n_jobs=n_jobs, return_as='generator_unordered')(
+                delayed(_evaluate)(params, fold, *folds[fold], n_samples) for params, fold in tasks)
+            for record in fits:
+                done[_result_key(record['params'], n_samples, record['fold'])] = record
+                results_file.write(json.dumps(record) + '\n')
+                results_file.flush()
+
+            scores = [np.mean([done[_result_key(params, n_samples, fold)]['roc_auc'] for fold in range(cv)])
+                      for params in candidates]
+            order = np.argsort(scores)[::-1]
+            best = {'params': candidates[order[0]], 'roc_auc': float(scores[order[0]]), 'n_samples': n_samples}
+            logging.info(f"Rung {rung} best ROC-AUC {best['roc_auc']:.4f} with {best['params']}")
+
+            keep = math.ceil(len(candidates) / factor)
+            candidates = [candidates[i] for i in order[:keep]]
+            if len(candidates) == 1 or n_samples == max_resources:
+                break
+
+    logging.info(f"Best parameters: {best['params']} (mean ROC-AUC {best['roc_auc']:.4f}).")
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune the fraud detection model.')
+    parser.add_argument('--data', default=CLEANED_DATA_PATH, help='Cleaned claims data.')
+    parser.add_argument('--method', default='halving', choices=['halving', 'random'])
+    parser.add_argument('--candidates', type=int, default=27, help='Parameter sets to sample.')
+    parser.add_argument('--factor', type=int, default=3, help='Halving rate between rungs.')
+    parser.add_argument('--cv', type=int, default=5, help='Number of folds.')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel fits.')
+    parser.add_argument('--results', default=RESULTS_PATH, help='Fit log used to resume a search.')
+    parser.add_argument('--refit', action='store_true', help='Train and save the model with the best parameters.')
+    args = parser.parse_args()
+
+    best = search_hyperparameters(args.data, method=args.method, n_candidates=args.candidates, factor=args.factor,
+                                  cv=args.cv, n_jobs=args.n_jobs, results_path=args.results)
+    if best is not None and args.refit:
+        train_model(args.data, params=best['params'])
@@ -2,13 +2,30 @@ import streamlit as st
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+import numpy as np
 import os
 
+from analysis_summary import NUMERICAL_FEATURES, dataset_version, frame_from_dict, load_summary
+from feature_store import CLEANED_DATA_PATH, parquet_path_for
+from instrumentation import stage
+
+
+@st.cache_data(max_entries=1)
+def load_page_summary(version):
+    """
+    Returns the precomputed aggregates for the page. The dataset version
+    is the cache key, so a new dataset rebuilds the summary once and every
+    other visit is served from memory no matter how many rows there are.
+    """
+    with stage('app.analysis_summary'):
+        return load_summary(CLEANED_DATA_PATH)
+
+
 # Define the main app function
 def app():
     """
     This function defines the data analysis page of the Streamlit application.
-    It loads the cleaned dataset and provides various visualizations.
+    It renders various visualizations from the precomputed dataset summary.
     """
     # --- Page Title and Description ---
     st.markdown("""
@@ -22,27 +39,28 @@ def app():
     st.markdown("---")
 
     # --- Load Data ---
-    data_path = 'claims_cleaned_data.csv'
-    if os.path.exists(data_path):
+    data_path = CLEANED_DATA_PATH
+    if os.path.exists(data_path) or os.path.exists(parquet_path_for(data_path)):
         with st.spinner('Loading data...'):
             try:
-                df = pd.read_csv(data_path)
+                summary = load_page_summary(dataset_version(data_path))
 
                 # --- Section 1: Data Overview ---
                 st.subheader("1. Dataset Overview")
                 st.write("Here is a preview of the cleaned dataset:")
-                st.dataframe(df.head())
-                st.write(f"The dataset contains **{df.shape[0]}** rows and **{df.shape[1]}** columns.")
+                st.dataframe(frame_from_dict(summary['head']))
+                st.write(f"The dataset contains **{summary['rows']}** rows and **{summary['columns']}** columns.")
                 
                 # --- Section 2: Descriptive Statistics ---
                 st.subheader("2. Descriptive Statistics")
                 st.write("Summary statistics for the numerical features:")
-                st.write(df.describe())
+                st.write(frame_from_dict(summary['describe']))
 
                 # --- Section 3: Fraud Distribution ---
                 st.subheader("3. Fraud vs. Legitimate Claims")
-                fraud_counts = df['PotentialFraud'].value_counts()
-                fraud_percentage = (fraud_counts / len(df)) * 100
+                fraud_counts = pd.Series(summary['fraud_counts'])
+                fraud_counts.index = fraud_counts.index.astype(int)
+                fraud_percentage = (fraud_counts / summary['rows']) * 100
                 
                 col1, col2 = st.columns([1, 2])
                 with col1:
@@ -55,21 +73,28 @@ def app():
                     ax.set_xlabel("Claim Type (0: Legitimate, 1: Fraud)", fontsize=12)
                     ax.set_ylabel("Number of Claims", fontsize=12)
                     st.pyplot(fig)
+                    plt.close(fig)
                 
                 st.markdown("---")
 
                 # --- Section 4: Numerical Feature Distribution ---
                 st.subheader("4. Distribution of Key Numerical Features")
-                numerical_features = ['InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt', 'IPAnnualDeductibleAmt', 'TotalReimbursement']
                 
                 fig, axes = plt.subplots(2, 2, figsize=(14, 10))
                 axes = axes.flatten()
-                for i, feature in enumerate(numerical_features):
-                    sns.histplot(df[feature], kde=True, ax=axes[i], color='skyblue', bins=50)
+                for i, feature in enumerate(NUMERICAL_FEATURES):
+                    hist = summary['histograms'][feature]
+                    edges = np.array(hist['edges'])
+                    widths = np.diff(edges)
+                    axes[i].bar(edges[:-1], hist['counts'], width=widths, align='edge', color='skyblue', edgecolor='white', alpha=0.75)
+                    # Scale the density to counts so the KDE overlays the bars, as seaborn's histplot does
+                    axes[i].plot(hist['grid'], np.array(hist['density']) * summary['rows'] * widths[0], color='skyblue', linewidth=2)
                     axes[i].set_title(f'Distribution of {feature}', fontsize=14)
                     axes[i].set_xlabel("")
+                    axes[i].set_ylabel("Count")
                 plt.tight_layout()
                 st.pyplot(fig)
+                plt.close(fig)
                 
                 st.markdown("---")
                 
@@ -77,20 +102,14 @@ def app():
                 st.subheader("5. Feature Correlation Heatmap")
                 st.write("This heatmap shows the correlation between different numerical features.")
                 
-                # Select only top features used in the model for clarity
-                top_features = ['Provider', 'InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt', 'IPAnnualDeductibleAmt', 
-                                'TotalReimbursement', 'RenalDiseaseIndicator', 'ChronicCond_Alzheimer', 
-                                'ChronicCond_Heartfailure', 'ChronicCond_KidneyDisease', 'ChronicCond_Cancer', 
-                                'ChronicCond_ObstrPulmonary', 'ChronicCond_Depression', 'ChronicCond_Diabetes', 
-                                'ChronicCond_IschemicHeart', 'ChronicCond_Osteoporasis', 'ChronicCond_rheumatoidarthritis', 
-                                'ChronicCond_stroke', 'PotentialFraud']
-                
-                corr_matrix = df[top_features].corr()
+                # Only the top features used in the model, for clarity
+                corr_matrix = frame_from_dict(summary['correlation'])
                 
                 fig, ax = plt.subplots(figsize=(16, 12))
                 sns.heatmap(corr_matrix, annot=True, fmt=".2f", cmap='coolwarm', ax=ax, annot_kws={"size": 8})
                 ax.set_title('Correlation Matrix of Key Features', fontsize=16)
                 st.pyplot(fig)
+                plt.close(fig)
 
             except Exception as e:
                 st.error(f"An error occurred while processing the data: {e}")
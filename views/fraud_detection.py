@@ -2,14 +2,34 @@ import streamlit as st
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import shap
 from streamlit_shap import st_shap
 import matplotlib.pyplot as plt
+import os
 
-# Load trained model and scaler
-model = joblib.load(open('claims_fraud_detection.pkl', 'rb'))
-scaler = joblib.load(open('scaler.pkl', 'rb'))
+from explain_claims import ClaimExplainer
+from instrumentation import stage
+from model_bundle import BUNDLE_PATH, ModelBundle
+
+
+@st.cache_resource(max_entries=1, show_spinner="Loading model...")
+def _load_artifacts(bundle_mtime):
+    """
+    Memory-maps the model bundle and builds the SHAP explainer once, shared
+    across reruns and sessions. The modification time is only used as the
+    cache key, so a new bundle on disk replaces the cached entry. The
+    explainer keeps an LRU cache of explanations, so claims that are checked
+    again are not recomputed.
+    """
+    with stage('app.load_artifacts'):
+        bundle = ModelBundle.load(BUNDLE_PATH)
+        explainer = ClaimExplainer(bundle)
+    return bundle, explainer
+
+
+def load_artifacts():
+    """Returns the cached (bundle, explainer), reloading them if the bundle changed."""
+    return _load_artifacts(os.path.getmtime(BUNDLE_PATH))
 
 # Define Streamlit app
 def app():
@@ -73,34 +93,32 @@ def app():
             st.warning(f"Please fill in: {', '.join(missing_fields)}")
         else:
             with st.spinner('Predicting...'):
-                input_data = pd.DataFrame([[Provider, InscClaimAmtReimbursed, IPAnnualReimbursementAmt, IPAnnualDeductibleAmt, 
-                                            TotalReimbursement, RenalDiseaseIndicator, ChronicCond_Alzheimer, 
-                                            ChronicCond_Heartfailure, ChronicCond_KidneyDisease, ChronicCond_Cancer, 
-                                            ChronicCond_ObstrPulmonary, ChronicCond_Depression, ChronicCond_Diabetes, 
-                                            ChronicCond_IschemicHeart, ChronicCond_Osteoporasis, ChronicCond_rheumatoidarthritis, 
-                                            ChronicCond_stroke]], 
-                                        columns=['Provider', 'InscClaimAmtReimbursed', 'IPAnnualReimbursementAmt', 
-                                                    'IPAnnualDeductibleAmt', 'TotalReimbursement', 'RenalDiseaseIndicator', 
-                                                    'ChronicCond_Alzheimer', 'ChronicCond_Heartfailure', 
-                                                    'ChronicCond_KidneyDisease', 'ChronicCond_Cancer', 
-                                                    'ChronicCond_ObstrPulmonary', 'ChronicCond_Depression', 
-                                                    'ChronicCond_Diabetes', 'ChronicCond_IschemicHeart', 
-                                                    'ChronicCond_Osteoporasis', 'ChronicCond_rheumatoidarthritis', 
-                                                    'ChronicCond_stroke'])
-
-                input_data_scaled = scaler.transform(input_data)
-                prediction = model.predict(input_data_scaled)
-                proba = model.predict_proba(input_data_scaled)[0][1]
-
-                if prediction[0] == 1:
+                bundle, explainer = load_artifacts()
+                claim = dict(Provider=Provider, InscClaimAmtReimbursed=InscClaimAmtReimbursed,
+                             IPAnnualReimbursementAmt=IPAnnualReimbursementAmt, IPAnnualDeductibleAmt=IPAnnualDeductibleAmt,
+                             TotalReimbursement=TotalReimbursement, RenalDiseaseIndicator=RenalDiseaseIndicator,
+                             ChronicCond_Alzheimer=ChronicCond_Alzheimer, ChronicCond_Heartfailure=ChronicCond_Heartfailure,
+                             ChronicCond_KidneyDisease=ChronicCond_KidneyDisease, ChronicCond_Cancer=ChronicCond_Cancer,
+                             ChronicCond_ObstrPulmonary=ChronicCond_ObstrPulmonary, ChronicCond_Depression=ChronicCond_Depression,
+                             ChronicCond_Diabetes=ChronicCond_Diabetes, ChronicCond_IschemicHeart=ChronicCond_IschemicHeart,
+                             ChronicCond_Osteoporasis=ChronicCond_Osteoporasis,
+                             ChronicCond_rheumatoidarthritis=ChronicCond_rheumatoidarthritis,
+                             ChronicCond_stroke=ChronicCond_stroke)
+                # Columns in the order of the bundle's feature schema
+                input_data = pd.DataFrame([claim])[bundle.feature_names].astype(float)
+
+                with stage('app.predict', rows=1):
+                    proba = bundle.predict_proba(input_data.values)[0][1]
+
+                if proba > 0.5:
                     st.markdown(f'<div class="result-box" style="background-color:#ffe6e6;"><h3 style="color:#c0392b;">🚨 This claim is likely <b>fraudulent</b>!</h3><p><b>Fraud Probability:</b> {proba:.2%}</p></div>', unsafe_allow_html=True)
                 else:
                     st.markdown(f'<div class="result-box" style="background-color:#e8f8f5;"><h3 style="color:#27ae60;">✅ This claim seems <b>legitimate</b>.</h3><p><b>Fraud Probability:</b> {proba:.2%}</p></div>', unsafe_allow_html=True)
 
                 with st.expander("View Feature Importance"):
                     st.write("#### Local Feature Importance (for this specific claim)")
-                    explainer = shap.TreeExplainer(model)
-                    shap_values = explainer.shap_values(input_data_scaled)
+                    with stage('app.explain', rows=1):
+                        shap_values = explainer.explain(input_data.values)
                     st_shap(shap.force_plot(explainer.expected_value, shap_values[0,:], input_data.iloc[0,:]))
 
                     st.markdown("---")
@@ -109,15 +127,13 @@ def app():
                     st.write("This plot shows how each feature's value pushes the prediction from the baseline to the final output.")
                     
                     # Create a SHAP explanation object for the waterfall plot
-                    expl = shap.Explanation(values=shap_values[0],
-                                            base_values=explainer.expected_value,
-                                            data=input_data.iloc[0].values,
-                                            feature_names=input_data.columns.tolist())
+                    expl = explainer.explanation(input_data.iloc[0].values, shap_values[0])
                     
                     # Generate the waterfall plot
                     fig, ax = plt.subplots()
                     shap.waterfall_plot(expl, show=False)
                     st.pyplot(fig)
+                    plt.close(fig)
 
 
 